@@ -99,6 +99,8 @@ if 'project_id' not in st.session_state:
     st.session_state.project_id = None
 if 'pdf_path' not in st.session_state:
     st.session_state.pdf_path = None
+if 'llm_cache_stats' not in st.session_state:
+    st.session_state.llm_cache_stats = {}
 
 # Sidebar for configuration
 with st.sidebar:
@@ -154,6 +156,24 @@ with st.sidebar:
         value=2,
         help="Only consider comments with at least this many upvotes"
     )
+
+    bypass_llm_cache = st.checkbox(
+        "Bypass LLM cache",
+        value=False,
+        help="Call the LLM for every step instead of reusing cached responses from earlier runs"
+    )
+
+    streaming_pipeline = st.checkbox(
+        "Streaming pipeline",
+        value=False,
+        help="Process each post from search to the vector store as soon as it is found instead of stage by stage"
+    )
+
+    resume_research = st.checkbox(
+        "Resume interrupted run",
+        value=False,
+        help="If the last run of this project idea failed, continue from the first unfinished step with its saved state"
+    )
     
     st.markdown("---")
 
@@ -165,6 +185,11 @@ with st.sidebar:
     if st.session_state.workflow_complete:
         st.success("✅ Workflow Complete!")
 
+    if st.session_state.llm_cache_stats:
+        cache_stats = st.session_state.llm_cache_stats
+        st.caption(f"LLM cache: {cache_stats['hits']} hits / {cache_stats['misses']} misses "
+                   f"({cache_stats['hit_rate']:.0%} hit rate, {cache_stats['entries']} entries)")
+
 
 # Main content area
 col1, col2 = st.columns([2, 1])
@@ -274,8 +299,10 @@ if st.session_state.workflow_running:
                     status_text.text(f"Processing: {step_name} - {details}")
 
             # Run the research agent
-            agent = RedditResearchAgent(project_id, projects_path, update_progress)
-            result =await agent.run_research(project_id, project_idea, config)
+            agent = RedditResearchAgent(project_id, projects_path, update_progress, bypass_llm_cache=bypass_llm_cache,
+                                        streaming=streaming_pipeline)
+            result =await agent.run_research(project_id, project_idea, config, resume=resume_research)
+            st.session_state.llm_cache_stats = result.get('llm_cache', {})
             print(result)
             pdf_path = result.get('final_state', {}).get('report_path')
             print(f"pdf_path: {pdf_path}")
@@ -368,6 +395,7 @@ if st.session_state.workflow_complete:
         st.session_state.current_step = ""
         st.session_state.project_id = None
         st.session_state.pdf_path = None
+        st.session_state.llm_cache_stats = {}
         st.rerun()
         
 # Footer
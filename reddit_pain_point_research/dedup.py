@@ -0,0 +1,65 @@
+import numpy as np
+from typing import Optional
+
+
+class EmbeddingDeduplicator:
+    """Vectorized cosine near-duplicate detection over embedding matrices"""
+
+    def __init__(self, threshold: float = 0.8, block_size: int = 1024):
+        self.threshold = threshold
+        self.block_size = max(1, block_size)
+
+    @staticmethod
+    def normalize(matrix) -> np.ndarray:
+        """L2-normalize rows so a dot product is the cosine similarity"""
+        matrix = np.asarray(matrix, dtype=np.float32)
+        if matrix.ndim == 1:
+            matrix = matrix.reshape(1, -1)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return matrix / norms
+
+    def max_similarity(self, queries: np.ndarray, corpus: np.ndarray) -> np.ndarray:
+        """Highest cosine similarity of each normalized query row against the normalized corpus"""
+        best = np.full(len(queries), -np.inf, dtype=np.float32)
+        if len(queries) == 0 or len(corpus) == 0:
+            return best
+
+        for start in range(0, len(corpus), self.block_size):
+            block = corpus[start:start + self.block_size]
+            np.maximum(best, (queries @ block.T).max(axis=1), out=best)
+        return best
+
+    def deduplicate(self, embeddings, existing: Optional[np.ndarray] = None) -> np.ndarray:
+        """Return a keep mask over embeddings.
+
+        A row is dropped when its similarity to an existing vector, or to an earlier
+        kept row of the same batch, reaches the threshold. Input order decides which
+        member of a cluster survives, as with sequential search-then-upsert.
+        """
+        vectors = self.normalize(embeddings)
+        keep = np.ones(len(vectors), dtype=bool)
+        if len(vectors) == 0:
+            return keep
+
+        if existing is not None and len(existing):
+            keep &= self.max_similarity(vectors, self.normalize(existing)) < self.threshold
+
+        kept_blocks = []
+        for start in range(0, len(vectors), self.block_size):
+            block = vectors[start:start + self.block_size]
+            block_keep = keep[start:start + self.block_size]
+
+            # Drop rows that match a row kept in an earlier block
+            if kept_blocks:
+                block_keep &= self.max_similarity(block, np.concatenate(kept_blocks)) < self.threshold
+
+            # Greedy clustering inside the block on one similarity matrix
+            similar = (block @ block.T) >= self.threshold
+            for i in range(len(block)):
+                if block_keep[i]:
+                    block_keep[i + 1:] &= ~similar[i, i + 1:]
+
+            kept_blocks.append(block[block_keep])
+
+        return keep
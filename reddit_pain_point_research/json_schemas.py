@@ -20,6 +20,9 @@ class PainPoints(BaseModel):
 class PainPointCategory(BaseModel):
     category: str = Field(description="Category of the pain point")
 
+class PainPointCategories(BaseModel):
+    categories: List[PainPointCategory] = Field(description="Category of each pain point, in the same order as the pain points")
+
 class PainPoint(BaseModel):
     """Data class for identified pain points"""
     id: str = Field(description="Unique identifier for the pain point")
@@ -110,7 +113,7 @@ class ResearchState(BaseModel):
     subreddits: List[str] = Field(default=[], description="List of subreddits")
     reddit_posts: List[RedditPost] = Field(default=[], description="List of Reddit posts")
     filtered_posts: List[RedditPost] = Field(default=[], description="List of filtered Reddit posts based on the project idea")
-    reddit_comments: List[RedditComment] = Field(default=[], description="List of Reddit comments")
+    comments_by_post: Dict[str, List[RedditComment]] = Field(default={}, description="Reddit comments grouped by post ID")
     pain_points: List[PainPoint] = Field(default=[], description="List of pain points")
     summarized_pain_points: Optional[SummarizedPainPoints] = Field(default=None, description="List of summarized pain points")
     solution_keywords: List[str] = Field(default=[], description="List of solution keywords")
@@ -119,4 +122,10 @@ class ResearchState(BaseModel):
     reddit_solutions: List[str] = Field(default=[], description="List of Reddit solutions")
     llm_solutions: List[str] = Field(default=[], description="List of LLM solutions")
     summarized_llm_solutions: Optional[SummarizedLLMSolutions] = Field(default=None, description="Summarized LLM solutions")
-    report_path: str = Field(default="", description="Path to the report")
\ No newline at end of file
+    workflow_topology: str = Field(default="", description="Hash of the workflow graph (batch or streaming) that produced this state")
+    pipeline_stats: Dict[str, Any] = Field(default={}, description="Per-stage statistics of a streaming run")
+    visualization_files: Dict[str, str] = Field(default={}, description="Paths of the report charts by name")
+    report_path: str = Field(default="", description="Path to the report")
+
+    def num_comments(self) -> int:
+        return sum(len(comments) for comments in self.comments_by_post.values())
\ No newline at end of file
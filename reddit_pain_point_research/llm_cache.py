@@ -0,0 +1,126 @@
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from typing import Any, Dict, Optional
+
+import logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+    datefmt='%Y-%m-%d %H:%M:%S'
+)
+logger = logging.getLogger(__name__)
+
+
+class LLMResponseCache:
+    """Content-addressed SQLite cache of LLM responses with TTL and LRU eviction"""
+
+    def __init__(self, db_path: str, ttl_seconds: float = 7 * 24 * 3600, max_size_bytes: int = 256 * 1024 * 1024):
+        self.db_path = db_path
+        self.ttl_seconds = ttl_seconds
+        self.max_size_bytes = max_size_bytes
+        self.hits = 0
+        self.misses = 0
+
+        db_dir = os.path.dirname(db_path)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            """CREATE TABLE IF NOT EXISTS llm_responses (
+                key TEXT PRIMARY KEY,
+                response TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )"""
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_llm_responses_last_access ON llm_responses (last_access)")
+        self.conn.commit()
+        self.purge_expired()
+
+    @staticmethod
+    def make_key(model_name: str, messages: Any, model_kwargs: Dict[str, Any], extra_body: Dict[str, Any]) -> str:
+        """Hash everything that determines the response: model, prompt, sampling kwargs and guided_json schema"""
+        payload = json.dumps(
+            {
+                "model": model_name,
+                "messages": messages,
+                "model_kwargs": model_kwargs,
+                "extra_body": extra_body,
+            },
+            sort_keys=True,
+            ensure_ascii=False,
+            default=str,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return the cached response or None on a miss or expired entry"""
+        row = self.conn.execute(
+            "SELECT response, created_at FROM llm_responses WHERE key = ?", (key,)
+        ).fetchone()
+
+        now = time.time()
+        if row is None or now - row[1] > self.ttl_seconds:
+            self.misses += 1
+            return None
+
+        self.conn.execute("UPDATE llm_responses SET last_access = ? WHERE key = ?", (now, key))
+        self.conn.commit()
+        self.hits += 1
+        return json.loads(row[0])
+
+    def put(self, key: str, response: Dict[str, Any]):
+        """Store a response and evict least recently used entries above the size bound"""
+        data = json.dumps(response, ensure_ascii=False)
+        now = time.time()
+        self.conn.execute(
+            "INSERT OR REPLACE INTO llm_responses (key, response, size, created_at, last_access) VALUES (?, ?, ?, ?, ?)",
+            (key, data, len(data.encode("utf-8")), now, now)
+        )
+        self.conn.commit()
+        self._evict()
+
+    def _evict(self):
+        total_size = self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM llm_responses").fetchone()[0]
+        if total_size <= self.max_size_bytes:
+            return
+
+        evict_keys = []
+        for key, size in self.conn.execute("SELECT key, size FROM llm_responses ORDER BY last_access ASC"):
+            if total_size <= self.max_size_bytes:
+                break
+            evict_keys.append((key,))
+            total_size -= size
+
+        self.conn.executemany("DELETE FROM llm_responses WHERE key = ?", evict_keys)
+        self.conn.commit()
+        logger.info(f"Evicted {len(evict_keys)} entries from LLM cache")
+
+    def purge_expired(self):
+        """Delete entries older than the TTL"""
+        cutoff = time.time() - self.ttl_seconds
+        deleted = self.conn.execute("DELETE FROM llm_responses WHERE created_at < ?", (cutoff,)).rowcount
+        self.conn.commit()
+        if deleted:
+            logger.info(f"Purged {deleted} expired entries from LLM cache")
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters for this process plus the current cache size"""
+        entries, size = self.conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM llm_responses").fetchone()
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": entries,
+            "size_bytes": size,
+        }
+
+    def close(self):
+        self.conn.close()
@@ -1,4 +1,4 @@
-from openai import OpenAI
+from openai import AsyncOpenAI
 import os
 import asyncio
 from typing import List, Dict, Any
@@ -7,6 +7,7 @@ from prompts import (
     keywords_extractor_prompt,
     pain_points_extractor_prompt,
     pain_point_categorizer_prompt,
+    pain_points_batch_categorizer_prompt,
     summarize_pain_points_prompt,
     generate_solutions_prompt,
     filter_posts_prompt,
@@ -20,6 +21,7 @@ from json_schemas import (
     PainPoints,
     PainPoint,
     PainPointCategory,
+    PainPointCategories,
     SummarizedPainPoints,
     GeneratedSolutions,
     RedditPost,
@@ -31,6 +33,8 @@ from json_schemas import (
     SummarizedLLMSolutions,
     ResearchState
 )
+from llm_cache import LLMResponseCache
+from prompt_packer import PromptPacker, estimate_tokens, load_token_counter
 
 import logging
 logging.basicConfig(
@@ -43,11 +47,98 @@ logger = logging.getLogger(__name__)
 from dotenv import load_dotenv
 load_dotenv()
 
+class TruncatedCompletionError(ValueError):
+    """The model hit max_tokens, so its guided JSON is cut off and can't be parsed"""
+
 class LLMManager: 
-    def __init__(self, model_name: str, endpoint: str):
+    def __init__(self, model_name: str, endpoint: str, max_concurrency: int = None, 
+                 cache_path: str = None, bypass_cache: bool = False):
         self.model_name = model_name
         self.endpoint = endpoint
-        self.llm = OpenAI(api_key="123", base_url=self.endpoint) 
+        self.llm = AsyncOpenAI(api_key="123", base_url=self.endpoint) 
+
+        # Max in-flight requests against the endpoint, lets vLLM batch concurrent calls
+        if max_concurrency is None:
+            max_concurrency = int(os.getenv("LLM_MAX_CONCURRENCY", 16))
+        self.max_concurrency = max(1, max_concurrency)
+        self.semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        # On-disk response cache, bypass it for runs that must resample the model
+        if cache_path is None:
+            cache_path = os.getenv("LLM_CACHE_PATH")
+        self.bypass_cache = bypass_cache or os.getenv("LLM_CACHE_BYPASS", "false").lower() == "true"
+        self.cache = None
+        if cache_path:
+            self.cache = LLMResponseCache(
+                cache_path,
+                ttl_seconds=float(os.getenv("LLM_CACHE_TTL_HOURS", 168)) * 3600,
+                max_size_bytes=int(float(os.getenv("LLM_CACHE_MAX_MB", 256)) * 1024 * 1024)
+            )
+
+        # Pain point extraction packs each thread into prompts under this many tokens, and
+        # allows this many completion tokens per prompt, with or without thinking
+        self.extract_max_tokens = int(os.getenv("EXTRACT_MAX_TOKENS", 8000))
+        self.prompt_packer = PromptPacker(
+            load_token_counter(os.getenv("LLM_TOKENIZER", model_name)),
+            budget_tokens=int(os.getenv("EXTRACT_PROMPT_TOKENS", 6000)),
+            max_parts=int(os.getenv("EXTRACT_MAX_CALLS_PER_POST", 4))
+        )
+        self.token_usage: List[Dict[str, Any]] = []
+
+    async def _chat_completion(self, messages: List[Dict[str, str]], model_kwargs: Dict[str, Any], extra_body: Dict[str, Any],
+                               usage: Dict[str, Any] = None) -> Dict[str, Any]:
+        """Send a chat completion request bounded by the concurrency semaphore.
+
+        When a usage dict is given, the server-reported token counts are written into it.
+        """
+        use_cache = self.cache is not None and not self.bypass_cache
+        if use_cache:
+            cache_key = self.cache.make_key(self.model_name, messages, model_kwargs, extra_body)
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                if usage is not None:
+                    usage["cached"] = True
+                return cached
+
+        async with self.semaphore:
+            response = await self.llm.chat.completions.create(
+                model=self.model_name, 
+                messages=messages,
+                **model_kwargs,
+                extra_body=extra_body
+            )
+        if usage is not None and response.usage is not None:
+            usage["prompt_tokens"] = response.usage.prompt_tokens
+            usage["completion_tokens"] = response.usage.completion_tokens
+        if response.choices[0].finish_reason == "length":
+            raise TruncatedCompletionError(f"Completion hit max_tokens={model_kwargs.get('max_tokens')}")
+        result = json.loads(response.choices[0].message.content)
+
+        if use_cache:
+            self.cache.put(cache_key, result)
+        return result
+
+    def cache_stats(self) -> Dict[str, Any]:
+        """Cache hit/miss counters, empty when caching is disabled"""
+        if self.cache is None:
+            return {}
+        stats = self.cache.stats()
+        stats["bypassed"] = self.bypass_cache
+        return stats
+
+    def token_usage_stats(self) -> Dict[str, Any]:
+        """Totals over the recorded pain point extraction calls"""
+        calls = [call for call in self.token_usage if not call.get("cached")]
+        return {
+            "extract_calls": len(self.token_usage),
+            "cached_calls": len(self.token_usage) - len(calls),
+            "prompt_tokens": sum(call.get("prompt_tokens", call["packed_tokens"]) for call in calls),
+            "completion_tokens": sum(call.get("completion_tokens", 0) for call in calls),
+            "max_prompt_tokens": max((call.get("prompt_tokens", call["packed_tokens"]) for call in calls), default=0),
+            "split_posts": len({call["post_id"] for call in self.token_usage if call["parts"] > 1}),
+            "dropped_comments": sum(call["dropped_comments"] for call in self.token_usage if call["part"] == 0),
+            "truncated_calls": sum(1 for call in self.token_usage if call.get("truncated")),
+        }
 
     async def generate_keywords(self, project_idea: str, is_thinking: bool = False) -> List[str]:
         """Generate keywords for project idea"""
@@ -75,10 +166,9 @@ class LLMManager:
                 "max_tokens": 512
             }
 
-        response = self.llm.chat.completions.create(
-            model=self.model_name, 
-            messages=messages,
-            **model_kwargs,
+        keywords = await self._chat_completion(
+            messages,
+            model_kwargs,
             extra_body={
                 "chat_template_kwargs": {"enable_thinking": is_thinking},
                 "guided_json": RedditKeywords.model_json_schema(),
@@ -86,15 +176,12 @@ class LLMManager:
                 "min_p": 0,
             }
         )
-
-        keywords = json.loads(response.choices[0].message.content)
         return keywords
 
     async def filter_posts(self, project_idea: str, posts: List[RedditPost], filter_threshold: int = 7, is_thinking: bool = False) -> List[RedditPost]: 
         """Filter posts using LLM"""
 
-        filtered_posts = []
-        for post in posts: 
+        async def score_post(post: RedditPost) -> int:
             prompt = filter_posts_prompt.format(
                 json_schema=PostScore.model_json_schema(),
                 project_idea=project_idea,
@@ -119,10 +206,9 @@ class LLMManager:
                     "max_tokens": 128
                 }
             
-            response = self.llm.chat.completions.create(
-                model=self.model_name, 
-                messages=messages,
-                **model_kwargs,
+            score = await self._chat_completion(
+                messages,
+                model_kwargs,
                 extra_body={
                     "chat_template_kwargs": {"enable_thinking": is_thinking},
                     "guided_json": PostScore.model_json_schema(),
@@ -130,8 +216,13 @@ class LLMManager:
                     "min_p": 0,
                 }
             )
-            score = json.loads(response.choices[0].message.content)
-            post_score = score["score"]
+            return score["score"]
+
+        # Requests are issued concurrently, the semaphore bounds in-flight calls
+        scores = await asyncio.gather(*(score_post(post) for post in posts))
+
+        filtered_posts = []
+        for post, post_score in zip(posts, scores):
             if post_score >= filter_threshold:
                 filtered_posts.append(post)
 
@@ -139,9 +230,8 @@ class LLMManager:
     
     async def filter_solution_posts(self, project_idea: str, posts: List[RedditPost], pain_points: str, is_thinking: bool = False, filter_threshold: int = 7) -> List[RedditPost]:
         """Filter solution posts using LLM"""
-        filtered_posts = []
-        solutions =[]
-        for i, post in enumerate(posts): 
+
+        async def score_post(i: int, post: RedditPost) -> Dict[str, Any]:
             logger.info(f"({i+1}/{len(posts)}) Filtering solution posts for post: {post.title}")
             prompt = solution_filter_prompt.format(
                 json_schema=SolutionPostScore.model_json_schema(),
@@ -168,10 +258,9 @@ class LLMManager:
                     "max_tokens": 4096
                 }
 
-            response = self.llm.chat.completions.create(
-                model=self.model_name, 
-                messages=messages,
-                **model_kwargs,
+            score = await self._chat_completion(
+                messages,
+                model_kwargs,
                 extra_body={
                     "chat_template_kwargs": {"enable_thinking": is_thinking},
                     "guided_json": SolutionPostScore.model_json_schema(),
@@ -179,8 +268,13 @@ class LLMManager:
                     "min_p": 0,
                 }
             )
-            
-            score = json.loads(response.choices[0].message.content)
+            return score
+
+        scores = await asyncio.gather(*(score_post(i, post) for i, post in enumerate(posts)))
+
+        filtered_posts = []
+        solutions =[]
+        for post, score in zip(posts, scores):
             post_score = score["score"]
             post_solution = score["solution"]
             if post_score >= filter_threshold:
@@ -189,51 +283,94 @@ class LLMManager:
         return filtered_posts, solutions
             
     async def extract_pain_points(self, project_idea: str, post: RedditPost, post_comments: List[RedditComment], is_thinking: bool = False) -> List[str]: 
-        """Extract pain points from content"""
-        
-        comments_text = "" 
-        for i, comment in enumerate(post_comments): 
-            comments_text += f"Comment {i+1}:\n{comment.content}\n"
+        """Extract pain points from content.
 
-        prompt = pain_points_extractor_prompt.format(
+        The post and its best-ranked comments are packed under a token budget; threads
+        that don't fit in one prompt are split over several calls whose pain points are
+        merged.
+        """
+        overhead_tokens = self.prompt_packer.count_tokens(pain_points_extractor_prompt.format(
             json_schema=PainPoints.model_json_schema(),
             project_idea=project_idea,
-            post_text=post.content,
-            post_comments=comments_text
-        )
-
-        messages = [
-            {"role": "user", "content": prompt}
-        ]
+            post_text="",
+            post_comments=""
+        ))
+        post_text, packs, dropped = self.prompt_packer.pack(overhead_tokens, post.content, post_comments)
+        if len(packs) > 1 or dropped:
+            logger.info(f"Post {post.id}: packed {len(post_comments) - dropped} comments into {len(packs)} prompts, "
+                        f"dropped {dropped} low-ranked comments")
 
         if is_thinking:
             model_kwargs = {
                 "temperature": 0.6,
                 "top_p": 0.95,
-                "max_tokens": 8000
+                "max_tokens": self.extract_max_tokens
             }
 
         else:
             model_kwargs = {
                 "temperature": 0.7,
                 "top_p": 0.8,
-                "max_tokens": 8000
+                "max_tokens": self.extract_max_tokens
             }
 
-        response = self.llm.chat.completions.create(
-            model=self.model_name, 
-            messages=messages,
-            **model_kwargs,
-            extra_body={
-                "chat_template_kwargs": {"enable_thinking": is_thinking},
-                "guided_json": PainPoints.model_json_schema(),
-                "top_k": 20,
-                "min_p": 0,
-            }
-        )
+        async def extract_pack(part: int, comments: List[str]) -> List[str]:
+            comments_text = "" 
+            for i, comment in enumerate(comments): 
+                comments_text += f"Comment {i+1}:\n{comment}\n"
+
+            prompt = pain_points_extractor_prompt.format(
+                json_schema=PainPoints.model_json_schema(),
+                project_idea=project_idea,
+                post_text=post_text,
+                post_comments=comments_text
+            )
 
-        pain_points = json.loads(response.choices[0].message.content)
-        return pain_points
+            messages = [
+                {"role": "user", "content": prompt}
+            ]
+
+            usage = {
+                "post_id": post.id,
+                "part": part,
+                "parts": len(packs),
+                "comments": len(comments),
+                "dropped_comments": dropped,
+                "packed_tokens": self.prompt_packer.count_tokens(prompt),
+            }
+            try:
+                pain_points = await self._chat_completion(
+                    messages,
+                    model_kwargs,
+                    extra_body={
+                        "chat_template_kwargs": {"enable_thinking": is_thinking},
+                        "guided_json": PainPoints.model_json_schema(),
+                        "top_k": 20,
+                        "min_p": 0,
+                    },
+                    usage=usage
+                )
+            except TruncatedCompletionError as e:
+                # Keep the other parts of the thread rather than failing the whole post
+                logger.warning(f"Post {post.id} part {part + 1}/{len(packs)}: {e}, skipping its pain points "
+                               f"(raise EXTRACT_MAX_TOKENS)")
+                usage["truncated"] = True
+                self.token_usage.append(usage)
+                return []
+            self.token_usage.append(usage)
+            return pain_points["pain_points"]
+
+        results = await asyncio.gather(*(extract_pack(part, comments) for part, comments in enumerate(packs)))
+
+        # Merge the parts; near-duplicates across parts are removed later by vector dedup
+        merged, seen = [], set()
+        for pain_points in results:
+            for pain_point in pain_points:
+                key = pain_point.strip().lower()
+                if key not in seen:
+                    seen.add(key)
+                    merged.append(pain_point)
+        return {"pain_points": merged}
 
     async def categorize_pain_point(self, project_idea: str, pain_point: str, is_thinking: bool = False) -> str:
         """Categorize pain point"""
@@ -262,10 +399,9 @@ class LLMManager:
                 "max_tokens": 128
             }
 
-        response = self.llm.chat.completions.create(
-            model=self.model_name, 
-            messages=messages,
-            **model_kwargs,
+        category = await self._chat_completion(
+            messages,
+            model_kwargs,
             extra_body={
                 "chat_template_kwargs": {"enable_thinking": is_thinking},
                 "guided_json": PainPointCategory.model_json_schema(),
@@ -273,10 +409,104 @@ class LLMManager:
                 "min_p": 0,
             }
         )
-
-        category = json.loads(response.choices[0].message.content)
         return category
 
+    async def categorize_pain_points(self, project_idea: str, pain_points: List[str], is_thinking: bool = False, 
+                                     max_chunk_tokens: int = 2048, max_chunk_size: int = 50) -> List[Dict[str, str]]:
+        """Categorize a list of pain points with one guided-JSON call per token-bounded chunk"""
+
+        chunks = []
+        current_chunk = []
+        current_tokens = 0
+        for pain_point in pain_points:
+            pain_point_tokens = estimate_tokens(pain_point)
+            if current_chunk and (current_tokens + pain_point_tokens > max_chunk_tokens or len(current_chunk) >= max_chunk_size):
+                chunks.append(current_chunk)
+                current_chunk = []
+                current_tokens = 0
+            current_chunk.append(pain_point)
+            current_tokens += pain_point_tokens
+        if current_chunk:
+            chunks.append(current_chunk)
+
+        async def categorize_single(pain_point: str) -> Dict[str, str]:
+            try:
+                return await self.categorize_pain_point(project_idea, pain_point, is_thinking=is_thinking)
+            except Exception as e:
+                logger.error(f"Categorization failed for a pain point, using 'Other': {e}")
+                return {"category": "Other"}
+
+        async def categorize_chunk(chunk: List[str]) -> List[Dict[str, str]]:
+            numbered_pain_points = ""
+            for i, pain_point in enumerate(chunk):
+                numbered_pain_points += f"{i+1}. {pain_point}\n"
+
+            # Pin the array to one category per pain point
+            schema = PainPointCategories.model_json_schema()
+            schema["properties"]["categories"]["minItems"] = len(chunk)
+            schema["properties"]["categories"]["maxItems"] = len(chunk)
+
+            prompt = pain_points_batch_categorizer_prompt.format(
+                json_schema=schema,
+                project_idea=project_idea,
+                pain_points=numbered_pain_points
+            )
+
+            messages = [
+                {"role": "user", "content": prompt}
+            ]
+
+            # ~32 tokens per category plus room for the JSON envelope
+            max_tokens = 32 * len(chunk) + 64
+
+            if is_thinking:
+                model_kwargs = {
+                    "temperature": 0.6,
+                    "top_p": 0.95,
+                    "max_tokens": max_tokens
+                }
+
+            else:
+                model_kwargs = {
+                    "temperature": 0.7,
+                    "top_p": 0.8,
+                    "max_tokens": max_tokens
+                }
+
+            try:
+                response = await self._chat_completion(
+                    messages,
+                    model_kwargs,
+                    extra_body={
+                        "chat_template_kwargs": {"enable_thinking": is_thinking},
+                        "guided_json": schema,
+                        "top_k": 20,
+                        "min_p": 0,
+                    }
+                )
+                categories = response["categories"]
+            except Exception as e:
+                logger.error(f"Batch categorization of {len(chunk)} pain points failed, falling back to single calls: {e}")
+                categories = None
+
+            if categories is not None and len(categories) != len(chunk):
+                # Safety net for backends that don't enforce minItems/maxItems
+                logger.warning(f"Batch categorization returned {len(categories)} categories for {len(chunk)} pain points, falling back to single calls")
+                categories = None
+
+            if categories is None:
+                # Per-item calls, so one bad response costs a single pain point, not the batch
+                categories = await asyncio.gather(*(categorize_single(pain_point) for pain_point in chunk))
+            return categories
+
+        chunk_categories = await asyncio.gather(*(categorize_chunk(chunk) for chunk in chunks))
+        logger.info(f"Categorized {len(pain_points)} pain points in {len(chunks)} requests")
+
+        categories = []
+        for chunk_category in chunk_categories:
+            categories.extend(chunk_category)
+        return categories
+
     async def summarize_pain_points(self, project_idea: str, pain_points: str, is_thinking: bool = False) -> str:
         """Summarize pain points"""
 
@@ -304,10 +534,9 @@ class LLMManager:
                 "max_tokens": 16000
             }
         
-        response = self.llm.chat.completions.create(
-            model=self.model_name, 
-            messages=messages,
-            **model_kwargs,
+        summarized_pain_points = await self._chat_completion(
+            messages,
+            model_kwargs,
             extra_body={
                 "chat_template_kwargs": {"enable_thinking": is_thinking},
                 "guided_json": SummarizedPainPoints.model_json_schema(),
@@ -315,8 +544,6 @@ class LLMManager:
                 "min_p": 0,
             }
         )
-
-        summarized_pain_points = json.loads(response.choices[0].message.content)
         return summarized_pain_points
 
     async def generate_solutions_keywords(self, project_idea: str, pain_points: SummarizedPainPoints, is_thinking: bool = False) -> str: 
@@ -349,10 +576,9 @@ class LLMManager:
                 "max_tokens": 16000
             }
 
-        response = self.llm.chat.completions.create(
-            model=self.model_name, 
-            messages=messages,
-            **model_kwargs,
+        solution_keywords = await self._chat_completion(
+            messages,
+            model_kwargs,
             extra_body={
                 "chat_template_kwargs": {"enable_thinking": is_thinking},
                 "guided_json": SolutionKeywords.model_json_schema(),
@@ -360,8 +586,6 @@ class LLMManager:
                 "min_p": 0,
             }
         )
-
-        solution_keywords = json.loads(response.choices[0].message.content)
         return solution_keywords
 
         '''prompt = generate_solutions_prompt.format(
@@ -418,10 +642,9 @@ class LLMManager:
                 "max_tokens": 2048
             }
         
-        response = self.llm.chat.completions.create(
-            model=self.model_name, 
-            messages=messages,
-            **model_kwargs,
+        llm_solution = await self._chat_completion(
+            messages,
+            model_kwargs,
             extra_body={
                 "chat_template_kwargs": {"enable_thinking": is_thinking},
                 "guided_json": LLMSolution.model_json_schema(), 
@@ -429,8 +652,6 @@ class LLMManager:
                 "min_p": 0,
             }
         )
-
-        llm_solution = json.loads(response.choices[0].message.content)
         return llm_solution["solution"]
     
     async def summarize_llm_solutions(self, project_idea: str, llm_solutions: List[str], 
@@ -471,10 +692,9 @@ class LLMManager:
                 "max_tokens": 16000
             }
 
-        response = self.llm.chat.completions.create(
-            model=self.model_name, 
-            messages=messages,
-            **model_kwargs,
+        summarized_llm_solutions = await self._chat_completion(
+            messages,
+            model_kwargs,
             extra_body={
                 "chat_template_kwargs": {"enable_thinking": is_thinking},
                 "guided_json": SummarizedLLMSolutions.model_json_schema(),
@@ -482,8 +702,6 @@ class LLMManager:
                 "min_p": 0,
             }
         )
-
-        summarized_llm_solutions = json.loads(response.choices[0].message.content)
         return summarized_llm_solutions
     
        
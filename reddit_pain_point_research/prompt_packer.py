@@ -0,0 +1,97 @@
+from functools import lru_cache
+from typing import Callable, List, Optional
+
+from json_schemas import RedditComment
+
+import logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+    datefmt='%Y-%m-%d %H:%M:%S'
+)
+logger = logging.getLogger(__name__)
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count for budgeting prompts (~4 characters per token)"""
+    return len(text) // 4 + 1
+
+
+@lru_cache(maxsize=None)
+def load_token_counter(tokenizer_name: Optional[str]) -> Callable[[str], int]:
+    """Token counter of the served model's tokenizer, or the character estimate when it can't be loaded.
+
+    Cached per name, so research runs in the same process load the tokenizer once.
+    """
+    if not tokenizer_name:
+        return estimate_tokens
+    try:
+        from transformers import AutoTokenizer
+        tokenizer = AutoTokenizer.from_pretrained(tokenizer_name)
+    except Exception as e:
+        logger.warning(f"Tokenizer {tokenizer_name} unavailable, estimating token counts: {e}")
+        return estimate_tokens
+
+    def count_tokens(text: str) -> int:
+        return len(tokenizer.encode(text, add_special_tokens=False))
+    return count_tokens
+
+
+def rank_comments(comments: List[RedditComment]) -> List[RedditComment]:
+    """Most informative first: high score, near the top of the thread, then most recent"""
+    return sorted(comments, key=lambda comment: (-comment.score / (1 + comment.depth), -comment.created_utc))
+
+
+class PromptPacker:
+    """Fits a post and its ranked comments into one or more prompts under a token budget"""
+
+    def __init__(self, count_tokens: Callable[[str], int], budget_tokens: int = 6000, max_parts: int = 4,
+                 max_post_share: float = 0.5):
+        self.count_tokens = count_tokens
+        self.budget_tokens = budget_tokens
+        self.max_parts = max(1, max_parts)
+        self.max_post_share = max_post_share
+
+    def truncate(self, text: str, max_tokens: int) -> str:
+        """Cut text to about max_tokens, keeping its beginning"""
+        tokens = self.count_tokens(text)
+        if tokens <= max_tokens:
+            return text
+        # Scale by the text's own characters per token, then trim any overshoot
+        cut = int(len(text) * max_tokens / tokens)
+        while cut > 0 and self.count_tokens(text[:cut]) > max_tokens:
+            cut = int(cut * 0.9)
+        return text[:cut] + "..."
+
+    def pack(self, overhead_tokens: int, post_text: str, comments: List[RedditComment]):
+        """Split ranked comments into at most max_parts packs that each fit the budget with the post.
+
+        Returns (post_text, packs, dropped): the possibly truncated post, lists of
+        comment texts per prompt, and how many low-ranked comments did not fit.
+        """
+        available = max(self.budget_tokens - overhead_tokens, 1)
+        post_text = self.truncate(post_text, int(available * self.max_post_share))
+        comment_budget = max(available - self.count_tokens(post_text), 1)
+
+        packs, current, current_tokens = [], [], 0
+        dropped = 0
+        for comment in rank_comments(comments):
+            if len(packs) == self.max_parts:
+                dropped += 1
+                continue
+
+            text = self.truncate(comment.content, comment_budget)
+            # Account for the "Comment i:" header and newlines around each comment
+            tokens = self.count_tokens(text) + 8
+            if current and current_tokens + tokens > comment_budget:
+                packs.append(current)
+                current, current_tokens = [], 0
+                if len(packs) == self.max_parts:
+                    dropped += 1
+                    continue
+            current.append(text)
+            current_tokens += tokens
+
+        if current or not packs:
+            packs.append(current)
+        return post_text, packs, dropped
@@ -163,6 +163,46 @@ project idea: {project_idea}
 pain point: {pain_point}
 """
 
+pain_points_batch_categorizer_prompt = """
+You're helping us organize and understand user pain points for a specific project idea by putting them into the right category. I'll give you a numbered list of user problems or frustrations, and you will choose the best category that describes the type of each issue.
+
+<instructions>
+Use the following categories:
+**User Experience & Interface** - Interface is confusing, hard to navigate, poor design, not intuitive, or lacks accessibility features.
+**Performance & Speed** - Slow loading times, laggy responses, poor optimization, or resource-intensive operations.
+**Cost & Pricing** - Too expensive, unclear pricing models, hidden fees, poor value proposition, or billing issues.
+**Feature Gaps & Functionality** - Missing essential features, limited capabilities, broken functionality, or inadequate feature depth.
+**Integration & Compatibility** - Problems with third-party integrations, platform compatibility, API limitations, or ecosystem connectivity.
+**Learning Curve & Documentation** - Steep learning curve, poor documentation, lack of tutorials, or insufficient onboarding.
+**Technical Reliability** - System crashes, bugs, downtime, error handling, or inconsistent behavior.
+**Data & Privacy Concerns** - Data security issues, privacy violations, compliance problems, or data portability concerns.
+**Customer Support & Community** - Poor customer service, lack of support channels, unresponsive help, or weak community resources.
+**Scalability & Growth Limitations** - Performance degradation with scale, resource limits, or inability to handle growing needs.
+**Workflow & Productivity** - Inefficient processes, time-consuming tasks, repetitive manual work, or poor automation.
+**Mobile & Cross-Platform Issues** - Mobile app problems, cross-device sync issues, or platform-specific limitations.
+**Customization & Flexibility** - Lack of customization options, rigid workflows, or inability to adapt to specific use cases.
+**Market & Competition** - Limited alternatives, vendor lock-in, competitive disadvantages, or industry-specific challenges.
+**Other** - Anything that doesn't fit well into the above categories.
+</instructions>
+
+<important>
+- Read each pain point carefully and categorize it independently of the others.
+- Think about the main problem the user is facing.
+- Choose the single best category from the list above for every pain point.
+- Consider both the technical and business aspects of the pain point.
+- Return exactly one category per pain point, in the same order as the numbered list.
+</important>
+
+<response_format>
+Return your response as a JSON object following this exact format:
+{json_schema}
+</response_format>
+
+project idea: {project_idea}
+pain points:
+{pain_points}
+"""
+
 summarize_pain_points_prompt = """
 You are helping us create a well-structured summaries of pain points related to a specific project idea.
 I will give you a list of pain points. Your job is to analyze them and return a clear, markdown-formatted summaries.
@@ -0,0 +1,71 @@
+import asyncio
+import time
+from typing import Optional
+
+import logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+    datefmt='%Y-%m-%d %H:%M:%S'
+)
+logger = logging.getLogger(__name__)
+
+
+class AsyncTokenBucket:
+    """Token bucket shared by coroutines, tightened by the server's rate-limit headers"""
+
+    def __init__(self, rate_per_minute: float = 100, capacity: int = None):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity or max(1, int(rate_per_minute // 10))
+        self.tokens = float(self.capacity)
+        self.updated_at = time.monotonic()
+
+        # Last X-Ratelimit-Remaining / X-Ratelimit-Reset seen from the server
+        self.remaining: Optional[float] = None
+        self.reset_at: Optional[float] = None
+
+        self.lock = asyncio.Lock()
+
+    def _current_rate(self, now: float) -> float:
+        if self.remaining is None or self.reset_at is None or now >= self.reset_at:
+            return self.rate
+        # Spread the requests the server still allows over the rest of its window
+        return min(self.rate, self.remaining / (self.reset_at - now))
+
+    def _refill(self, now: float):
+        elapsed = now - self.updated_at
+        self.tokens = min(self.capacity, self.tokens + elapsed * self._current_rate(now))
+        self.updated_at = now
+        if self.reset_at is not None and now >= self.reset_at:
+            self.remaining = None
+            self.reset_at = None
+
+    async def acquire(self):
+        """Wait until a request may be sent"""
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                self._refill(now)
+                if self.tokens >= 1 and (self.remaining is None or self.remaining >= 1):
+                    self.tokens -= 1
+                    if self.remaining is not None:
+                        self.remaining -= 1
+                    return
+
+                rate = self._current_rate(now)
+                if self.remaining is not None and self.remaining < 1:
+                    wait = self.reset_at - now
+                else:
+                    wait = (1 - self.tokens) / rate
+                await asyncio.sleep(max(wait, 0.01))
+
+    def update_from_headers(self, remaining: Optional[float], reset_seconds: Optional[float]):
+        """Record the server's remaining quota and seconds until the window resets"""
+        if remaining is None or reset_seconds is None:
+            return
+        now = time.monotonic()
+        self.remaining = float(remaining)
+        self.reset_at = now + max(float(reset_seconds), 0.0)
+        self.tokens = min(self.tokens, self.remaining)
+        if self.remaining < 1:
+            logger.warning(f"Reddit rate limit exhausted, waiting {reset_seconds:.0f}s for reset")
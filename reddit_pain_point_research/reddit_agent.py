@@ -1,12 +1,19 @@
 from langgraph.graph import StateGraph, START, END
+try:
+    from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+except ImportError:
+    AsyncSqliteSaver = None
 import json
 import logging
 from typing import Dict, Any
 import asyncio
 from llm_manager import LLMManager
 from reddit_manager import RedditAPIManager 
-from vector_manager import VectorDBManager
+from vector_manager import REPORT_PAYLOAD_FIELDS, VectorDBManager
 from report_manager import ReportGenerator
+from stage_executor import StageExecutor
+from workflow_timing import WorkflowTimer
+from streaming_pipeline import StreamingPipeline
 
 import os
 import hashlib
@@ -43,16 +50,53 @@ logging.getLogger('fontTools').setLevel(logging.ERROR)
 logger = logging.getLogger(__name__)
 
 
+# Research DAG: each node runs once all of its dependencies have finished
+WORKFLOW_DEPENDENCIES = {
+    "generate_keywords": [],
+    "get_subreddits": ["generate_keywords"],
+    "search_subreddits": ["get_subreddits"],
+    "llm_filter_posts": ["search_subreddits"],
+    "extract_comments": ["llm_filter_posts"],
+    "analyze_content": ["extract_comments"],
+    "store_vectors": ["analyze_content"],
+    "summarize_pain_points": ["store_vectors"],
+    "generate_visualizations": ["store_vectors"],
+    "generate_solutions_keywords": ["summarize_pain_points"],
+    "search_solution_posts": ["generate_solutions_keywords"],
+    # Runs beside search_solution_posts, since LangGraph advances branches in lockstep supersteps
+    "generate_llm_solutions": ["generate_solutions_keywords"],
+    "summarize_solutions": ["search_solution_posts", "generate_llm_solutions"],
+    "generate_report": ["summarize_solutions", "generate_visualizations"],
+}
+
+# Streaming mode: one node moves each post from search to the vector store on its own
+STREAMED_NODES = ("search_subreddits", "llm_filter_posts", "extract_comments", "analyze_content", "store_vectors")
+STREAMING_WORKFLOW_DEPENDENCIES = {
+    "stream_research": ["get_subreddits"],
+    **{
+        name: ["stream_research" if dep == "store_vectors" else dep for dep in deps]
+        for name, deps in WORKFLOW_DEPENDENCIES.items() if name not in STREAMED_NODES
+    },
+}
+
+def workflow_topology(dependencies: Dict[str, Any]) -> str:
+    """Stable hash of a dependency map, so checkpoints from a different graph are never resumed"""
+    return hashlib.sha256(json.dumps(dependencies, sort_keys=True).encode("utf-8")).hexdigest()[:16]
 
 class RedditResearchAgent:
     """Main agent orchestrating the research workflow"""
 
-    def __init__(self, project_id: str, projects_path: str, progress_callback=None):
+    def __init__(self, project_id: str, projects_path: str, progress_callback=None, stage_workers: int = None, 
+                 bypass_llm_cache: bool = False, streaming: bool = None):
         self.progress_callback = progress_callback 
-        self.reddit_manager = RedditAPIManager()
+        self.reddit_manager = RedditAPIManager(
+            corpus_path=os.getenv("REDDIT_CORPUS_PATH", os.path.join(projects_path, "reddit_corpus.sqlite"))
+        )
         self.llm_manager = LLMManager(
             model_name=os.getenv("MODEL_NAME"),
-            endpoint=os.getenv("ENDPOINT")
+            endpoint=os.getenv("ENDPOINT"),
+            cache_path=os.getenv("LLM_CACHE_PATH", os.path.join(projects_path, "llm_cache.sqlite")),
+            bypass_cache=bypass_llm_cache
         )
 
         self.projects_path = projects_path
@@ -60,43 +104,60 @@ class RedditResearchAgent:
 
         self.vector_db = VectorDBManager()
         self.report_manager = ReportGenerator(project_id=project_id, projects_path=projects_path, vector_db=self.vector_db)
+
+        # Worker pool width for the per-post and per-theme stages
+        if stage_workers is None:
+            stage_workers = int(os.getenv("STAGE_WORKERS", 8))
+        self.stage_executor = StageExecutor(width=stage_workers, progress_callback=progress_callback)
+        self.workflow_timer = WorkflowTimer()
+
+        if streaming is None:
+            streaming = os.getenv("STREAMING_PIPELINE", "false").lower() == "true"
+        self.workflow_dependencies = STREAMING_WORKFLOW_DEPENDENCIES if streaming else WORKFLOW_DEPENDENCIES
+        self.workflow_topology = workflow_topology(self.workflow_dependencies)
+        self.stream_queue_size = int(os.getenv("STREAM_QUEUE_SIZE", 16))
+        self.stream_store_batch_size = int(os.getenv("STREAM_STORE_BATCH_SIZE", 32))
         
         self.workflow = self._build_workflow()
 
-    def _build_workflow(self): 
-        """Build the LangGraph workflow"""
+    def _build_workflow(self, checkpointer=None): 
+        """Build the LangGraph workflow, checkpointing state after every node when a checkpointer is given"""
 
         workflow = StateGraph(ResearchState)
 
-        # Add nodes
-        workflow.add_node("generate_keywords", self._generate_keywords)
-        workflow.add_node("get_subreddits", self._get_subreddits)
-        workflow.add_node("search_subreddits", self._search_subreddits)
-        workflow.add_node("llm_filter_posts", self._llm_filter_posts)
-        workflow.add_node("extract_comments", self._extract_comments)
-        workflow.add_node("analyze_content", self._analyze_content)
-        workflow.add_node("store_vectors", self._store_vectors)
-        workflow.add_node("summarize_pain_points", self._summarize_pain_points)
-        workflow.add_node("generate_solutions_keywords", self.generate_solutions_keywords)
-        workflow.add_node("generate_solutions", self.generate_solutions)
-        workflow.add_node("generate_report", self._generate_report)
-
-
-        # Add edges
-        workflow.add_edge(START, "generate_keywords")
-        workflow.add_edge("generate_keywords", "get_subreddits")
-        workflow.add_edge("get_subreddits", "search_subreddits")
-        workflow.add_edge("search_subreddits", "llm_filter_posts")
-        workflow.add_edge("llm_filter_posts", "extract_comments")
-        workflow.add_edge("extract_comments", "analyze_content")
-        workflow.add_edge("analyze_content", "store_vectors")
-        workflow.add_edge("store_vectors", "summarize_pain_points")
-        workflow.add_edge("summarize_pain_points", "generate_solutions_keywords")
-        workflow.add_edge("generate_solutions_keywords", "generate_solutions")
-        workflow.add_edge("generate_solutions", "generate_report")
-        workflow.add_edge("generate_report", END)
-
-        return workflow.compile() 
+        nodes = {
+            "generate_keywords": self._generate_keywords,
+            "get_subreddits": self._get_subreddits,
+            "search_subreddits": self._search_subreddits,
+            "llm_filter_posts": self._llm_filter_posts,
+            "extract_comments": self._extract_comments,
+            "analyze_content": self._analyze_content,
+            "store_vectors": self._store_vectors,
+            "stream_research": self._stream_research,
+            "summarize_pain_points": self._summarize_pain_points,
+            "generate_visualizations": self._generate_visualizations,
+            "generate_solutions_keywords": self.generate_solutions_keywords,
+            "search_solution_posts": self._search_solution_posts,
+            "generate_llm_solutions": self._generate_llm_solutions,
+            "summarize_solutions": self._summarize_solutions,
+            "generate_report": self._generate_report,
+        }
+        for name in self.workflow_dependencies:
+            workflow.add_node(name, self.workflow_timer.wrap(name, nodes[name]))
+
+        # Fan-out where nodes share a dependency, fan-in where a node waits on several
+        dependents = {dep for deps in self.workflow_dependencies.values() for dep in deps}
+        for name, deps in self.workflow_dependencies.items():
+            if not deps:
+                workflow.add_edge(START, name)
+            elif len(deps) == 1:
+                workflow.add_edge(deps[0], name)
+            else:
+                workflow.add_edge(deps, name)
+            if name not in dependents:
+                workflow.add_edge(name, END)
+
+        return workflow.compile(checkpointer=checkpointer) 
 
     def _update_progress(self, step_name, details=None):
         """Helper method to update progress"""
@@ -134,24 +195,20 @@ class RedditResearchAgent:
     async def _search_subreddits(self, state: ResearchState) -> ResearchState:
         """Search Reddit for relevant posts"""
         
-        all_posts = []
-        for keyword in state.keywords:
-            logger.info(f"Searching Subreddits for keyword: {keyword}")
-            self._update_progress("Search Posts", f"Searching Subreddits for keyword: {keyword}")
-
-            posts = await self.reddit_manager.search_subreddits(state.subreddits, 
-                                                                keyword, 
-                                                                limit=state.config["posts_per_subreddit"],
-                                                                min_post_score=state.config["min_post_score"],
-                                                                num_comments=state.config["min_comments"])
-            all_posts.extend(posts) 
-        
-        # Remove duplicates
-        logger.info(f"Found {len(all_posts)} posts")
-        logger.info(f"Removing duplicates...")
+        logger.info(f"Searching Subreddits for keywords: {state.keywords}")
+        self._update_progress("Search Posts", f"Searching {len(state.subreddits)} subreddits for {len(state.keywords)} keywords")
+
+        # Posts arrive deduplicated as soon as their query completes
+        unique_posts = []
+        async for post in self.reddit_manager.stream_search(state.keywords, 
+                                                            state.subreddits, 
+                                                            limit=state.config["posts_per_subreddit"],
+                                                            min_post_score=state.config["min_post_score"],
+                                                            num_comments=state.config["min_comments"]):
+            unique_posts.append(post)
+            self._update_progress("Search Posts", f"Found {len(unique_posts)} posts so far")
         
-        unique_posts = {post.id: post for post in all_posts}
-        state.reddit_posts = list(unique_posts.values())
+        state.reddit_posts = unique_posts
 
         logger.info(f"Found {len(state.reddit_posts)} unique posts")
         self._update_progress("Search Posts", f"Found {len(state.reddit_posts)} posts total")
@@ -174,20 +231,24 @@ class RedditResearchAgent:
     async def _extract_comments(self, state: ResearchState) -> ResearchState:
         """Extract comments from Reddit posts"""
         
-        all_comments = []
-        for post in state.filtered_posts:
+        async def extract_post_comments(post):
             logger.info(f"Extracting comments for post: {post.title}")
-            self._update_progress("Extract Comments", f"Extracting comments for post: {post.title}")
-            comments = await self.reddit_manager.get_post_comments(
+            return await self.reddit_manager.get_post_comments(
                 post_id=post.id, 
                 limit=state.config["comments_per_post"], 
                 min_comment_score=state.config["min_comment_score"])
-            all_comments.extend(comments)
-        
-        logger.info(f"Extracted {len(all_comments)} comments")
-        self._update_progress("Extract Comments", f"Extracted {len(all_comments)} comments")
 
-        state.reddit_comments = all_comments
+        self._update_progress("Extract Comments", f"Extracting comments for {len(state.filtered_posts)} posts")
+        results = await self.stage_executor.map("Extract Comments", state.filtered_posts, extract_post_comments)
+
+        # Indexed by post so consumers look up a post's comments instead of scanning all of them
+        comments_by_post = {}
+        for post, comments in zip(state.filtered_posts, results):
+            comments_by_post[post.id] = comments or []
+        state.comments_by_post = comments_by_post
+        
+        logger.info(f"Extracted {state.num_comments()} comments")
+        self._update_progress("Extract Comments", f"Extracted {state.num_comments()} comments")
         return state
 
     async def _analyze_content(self, state: ResearchState) -> ResearchState:
@@ -195,31 +256,28 @@ class RedditResearchAgent:
         logger.info("Analyzing content for pain points...")
         self._update_progress("Analyze Content", "Analyzing content for pain points...")
 
-        pain_points = []
-        for post in state.filtered_posts:
-            #get comments for the post
-            post_comments = []
-            for comment in state.reddit_comments:
-                if comment.post_id == post.id:
-                    post_comments.append(comment)
-
+        async def analyze_post(post):
             extracted_pain_points = await self.llm_manager.extract_pain_points(
                 state.project_idea, 
                 post,
-                post_comments,
+                state.comments_by_post.get(post.id, []),
                 is_thinking=False)
         
-            pain_points_texts = extracted_pain_points["pain_points"] 
-            for i, text in enumerate(pain_points_texts):
-                pain_point_id = hashlib.md5(text.encode()).hexdigest()  
-                pain_point_category = await self.llm_manager.categorize_pain_point(state.project_idea, text)   
-                pain_point = PainPoint(
-                    id=str(pain_point_id),
-                    content=text,
-                    category=pain_point_category["category"],
-                    sources_post=post.id
-                )
-                pain_points.append(pain_point)
+            return extracted_pain_points["pain_points"]
+
+        results = await self.stage_executor.map("Analyze Content", state.filtered_posts, analyze_post)
+
+        pain_points_texts = []
+        pain_points_sources = []
+        for post, post_pain_points in zip(state.filtered_posts, results):
+            if post_pain_points:
+                pain_points_texts.extend(post_pain_points)
+                pain_points_sources.extend([post.id] * len(post_pain_points))
+
+        self._update_progress("Analyze Content", f"Categorizing {len(pain_points_texts)} pain points...")
+        pain_point_categories = await self.llm_manager.categorize_pain_points(state.project_idea, pain_points_texts)
+
+        pain_points = self._make_pain_points(pain_points_texts, pain_points_sources, pain_point_categories)
 
         logger.info(f"Total pain points: {len(pain_points)}")
         self._update_progress("Analyze Content", "Content analysis complete")
@@ -227,12 +285,97 @@ class RedditResearchAgent:
         state.pain_points = pain_points
         return state
 
+    @staticmethod
+    def _make_pain_points(texts, sources, categories) -> list:
+        pain_points = []
+        for text, source_post, pain_point_category in zip(texts, sources, categories):
+            pain_point_id = hashlib.md5(text.encode()).hexdigest()  
+            pain_point = PainPoint(
+                id=str(pain_point_id),
+                content=text,
+                category=pain_point_category["category"],
+                sources_post=source_post
+            )
+            pain_points.append(pain_point)
+        return pain_points
+
+    async def _stream_research(self, state: ResearchState) -> ResearchState:
+        """Streaming mode: move each post through filter, comments, extraction and storage as soon as it is found"""
+        logger.info(f"Streaming research for keywords: {state.keywords}")
+        self._update_progress("Search Posts", f"Streaming {len(state.subreddits)} subreddits for {len(state.keywords)} keywords")
+
+        reddit_posts, filtered_posts, pain_points = [], [], []
+        comments_by_post = {}
+
+        async def search_posts():
+            async for post in self.reddit_manager.stream_search(state.keywords, 
+                                                                state.subreddits, 
+                                                                limit=state.config["posts_per_subreddit"],
+                                                                min_post_score=state.config["min_post_score"],
+                                                                num_comments=state.config["min_comments"]):
+                reddit_posts.append(post)
+                yield post
+
+        async def filter_post(post):
+            kept_posts = await self.llm_manager.filter_posts(state.project_idea, [post])
+            filtered_posts.extend(kept_posts)
+            return kept_posts
+
+        async def extract_post_comments(post):
+            comments = await self.reddit_manager.get_post_comments(
+                post_id=post.id, 
+                limit=state.config["comments_per_post"], 
+                min_comment_score=state.config["min_comment_score"])
+            comments_by_post[post.id] = comments
+            return [(post, comments)]
+
+        async def analyze_post(post_with_comments):
+            post, comments = post_with_comments
+            extracted_pain_points = await self.llm_manager.extract_pain_points(
+                state.project_idea, 
+                post,
+                comments,
+                is_thinking=False)
+            return [(text, post.id) for text in extracted_pain_points["pain_points"]]
+
+        async def categorize_and_store(pain_point_sources):
+            texts = [text for text, _ in pain_point_sources]
+            categories = await self.llm_manager.categorize_pain_points(state.project_idea, texts)
+            batch = self._make_pain_points(texts, [source for _, source in pain_point_sources], categories)
+            # Single worker, so dedup against stored vectors sees every earlier batch
+            await asyncio.to_thread(self.vector_db.store_vectors, batch, state.project_id)
+            pain_points.extend(batch)
+            return batch
+
+        width = self.stage_executor.width
+        pipeline = StreamingPipeline(queue_size=self.stream_queue_size, progress_callback=self.progress_callback)
+        pipeline.add_stage("Filter with AI", filter_post, workers=width)
+        pipeline.add_stage("Extract Comments", extract_post_comments, workers=width)
+        pipeline.add_stage("Analyze Content", analyze_post, workers=width)
+        pipeline.add_stage("Store Vectors", categorize_and_store, batch_size=self.stream_store_batch_size)
+        pipeline_stats = await pipeline.run(search_posts())
+
+        state.reddit_posts = reddit_posts
+        state.filtered_posts = filtered_posts
+        state.comments_by_post = comments_by_post
+        state.pain_points = pain_points
+        state.pipeline_stats = pipeline_stats
+
+        logger.info(f"Streamed {len(reddit_posts)} posts, {len(filtered_posts)} filtered, "
+                    f"{state.num_comments()} comments, {len(pain_points)} pain points")
+        self._update_progress("Store Vectors", f"Stored {len(pain_points)} pain points")
+        # Scroll the project once here; summarization and charts both read this snapshot
+        await asyncio.to_thread(self.vector_db.get_unique_pain_points, state.project_id, REPORT_PAYLOAD_FIELDS)
+        return state
+
     async def _store_vectors(self, state: ResearchState) -> ResearchState:
         """Store pain points in vector database"""
         logger.info("Creating and storing vector embeddings...")
         self._update_progress("Store Vectors", "Creating and storing vector embeddings...")
 
-        self.vector_db.store_vectors(state.pain_points, state.project_id)
+        await asyncio.to_thread(self.vector_db.store_vectors, state.pain_points, state.project_id)
+        # Scroll the project once here; summarization and charts both read this snapshot
+        await asyncio.to_thread(self.vector_db.get_unique_pain_points, state.project_id, REPORT_PAYLOAD_FIELDS)
 
         self._update_progress("Store Vectors", "Vector embeddings created and stored") 
 
@@ -243,8 +386,8 @@ class RedditResearchAgent:
         logger.info("Identifying and summarizing pain points...")
         self._update_progress("Summarize Pain Points", "Identifying and summarizing pain points...")
 
-        unique_pain_points = self.vector_db.get_unique_pain_points(
-            project_id=state.project_id
+        unique_pain_points = await asyncio.to_thread(
+            self.vector_db.get_unique_pain_points, state.project_id, REPORT_PAYLOAD_FIELDS
         )
 
         pain_points = "" 
@@ -252,10 +395,23 @@ class RedditResearchAgent:
             pain_points += f"{i+1}. {pain_point['content']}\n" 
 
         summarized_pain_points = await self.llm_manager.summarize_pain_points(state.project_idea, pain_points)
-        state.summarized_pain_points = summarized_pain_points
 
         self._update_progress("Summarize Pain Points", "Pain points summarized")
-        return state
+        # Partial update: runs in the same step as generate_visualizations
+        return {"summarized_pain_points": summarized_pain_points}
+
+    async def _generate_visualizations(self, state: ResearchState) -> Dict[str, Any]:
+        """Render the report charts from the stored vectors"""
+        logger.info("Generating visualizations...")
+        self._update_progress("Generate Report", "Rendering charts...")
+
+        unique_pain_points = await asyncio.to_thread(
+            self.vector_db.get_unique_pain_points, state.project_id, REPORT_PAYLOAD_FIELDS
+        )
+        viz_files = await asyncio.to_thread(self.report_manager.generate_visualizations, unique_pain_points)
+
+        self._update_progress("Generate Report", "Charts rendered")
+        return {"visualization_files": viz_files}
 
     async def generate_solutions_keywords(self, state: ResearchState) -> ResearchState: 
         """Generate solutions for pain points""" 
@@ -271,46 +427,43 @@ class RedditResearchAgent:
         state.solution_keywords = solution_keywords["keywords"][:state.config["num_keywords"]]
         return state
 
-    async def generate_solutions(self, state: ResearchState) -> ResearchState: 
-        """Generate solutions for pain points""" 
-        logger.info("Generating solutions for pain points...")
-        self._update_progress("Generate Solutions", "Generating solutions for pain points...")
+    @staticmethod
+    def _format_summarized_pain_points(state: ResearchState) -> str:
+        all_summarized_pain_points = ""
+        for summ_pain_point in state.summarized_pain_points.summarized_pain_points:
+            all_summarized_pain_points += f"{summ_pain_point.theme_name}: {summ_pain_point.description}\n"
+        return all_summarized_pain_points
+
+    async def _search_solution_posts(self, state: ResearchState) -> Dict[str, Any]: 
+        """Find and filter Reddit posts discussing solutions to the pain points""" 
+        logger.info("Searching Reddit for solutions...")
+        self._update_progress("Generate Solutions", "Searching Reddit for solutions...")
 
         solution_subreddits = await self.reddit_manager.get_subreddits(state.solution_keywords)
         logger.info(f"Found {len(solution_subreddits)} solution subreddits") 
         self._update_progress("Generate Solutions", f"Found {len(solution_subreddits)} solution subreddits")
 
-        all_posts = []
-        for keyword in state.solution_keywords:
-            logger.info(f"Searching Subreddits for Solution keyword: {keyword}")
-            self._update_progress("Generate Solutions", f"Searching Subreddits for Solution keyword: {keyword}")
-            posts = await self.reddit_manager.search_subreddits(solution_subreddits, 
-                                                                keyword, 
-                                                                limit=state.config["posts_per_subreddit"],
-                                                                min_post_score=state.config["min_post_score"],
-                                                                num_comments=state.config["min_comments"])
-            all_posts.extend(posts)
-        
-        logger.info(f"Found {len(all_posts)} Solution posts")
-        logger.info(f"Removing duplicates...")
-
-        unique_posts = {post.id: post for post in all_posts}
-        state.solution_reddit_posts = list(unique_posts.values())
+        logger.info(f"Searching Subreddits for Solution keywords: {state.solution_keywords}")
+        self._update_progress("Generate Solutions", f"Searching {len(solution_subreddits)} subreddits for {len(state.solution_keywords)} solution keywords")
 
-        logger.info(f"Found {len(state.solution_reddit_posts)} unique posts")
-        self._update_progress("Generate Solutions", f"Found {len(state.solution_reddit_posts)} unique posts")
+        unique_posts = []
+        async for post in self.reddit_manager.stream_search(state.solution_keywords, 
+                                                            solution_subreddits, 
+                                                            limit=state.config["posts_per_subreddit"],
+                                                            min_post_score=state.config["min_post_score"],
+                                                            num_comments=state.config["min_comments"]):
+            unique_posts.append(post)
+        
+        logger.info(f"Found {len(unique_posts)} unique posts")
+        self._update_progress("Generate Solutions", f"Found {len(unique_posts)} unique posts")
         
         logger.info(f"Filtering solution posts...")
         self._update_progress("Generate Solutions", "Filtering solution posts...")
 
-        summarized_pain_points = state.summarized_pain_points.summarized_pain_points
-        all_summarized_pain_points = ""
-        for summ_pain_point in summarized_pain_points:
-            all_summarized_pain_points += f"{summ_pain_point.theme_name}: {summ_pain_point.description}\n"
-
+        all_summarized_pain_points = self._format_summarized_pain_points(state)
 
         reddit_filtered_posts, reddit_solutions = await self.llm_manager.filter_solution_posts(state.project_idea, 
-                                                                               state.solution_reddit_posts,
+                                                                               unique_posts,
                                                                                all_summarized_pain_points,
                                                                                filter_threshold=7)
         
@@ -342,30 +495,40 @@ class RedditResearchAgent:
             reddit_solutions = truncated_solutions
             logger.info(f"Truncated reddit solutions to {sum(len(s.split()) for s in reddit_solutions)} words")
         
-        state.solution_filtered_posts = reddit_filtered_posts
-        state.reddit_solutions = reddit_solutions
+        # Partial update: runs in the same step as generate_llm_solutions
+        return {
+            "solution_reddit_posts": unique_posts,
+            "solution_filtered_posts": reddit_filtered_posts,
+            "reddit_solutions": reddit_solutions,
+        }
 
-        #get llm solutions for pain points 
+    async def _generate_llm_solutions(self, state: ResearchState) -> Dict[str, Any]: 
+        """Generate an AI solution for each summarized pain point theme""" 
+        logger.info("Generating solutions for pain points...")
         self._update_progress("Generate Solutions", "Generating AI solutions for pain points...")
-        all_llm_solutions = [] 
-        for summ_pain_point in summarized_pain_points:
+        async def generate_theme_solution(summ_pain_point):
             text = f"Pain point: {summ_pain_point.theme_name}\nDescription: {summ_pain_point.description}"
-            llm_solutions = await self.llm_manager.generate_each_solutions(state.project_idea, 
-                                                                      text)
-            all_llm_solutions.append(llm_solutions)
+            return await self.llm_manager.generate_each_solutions(state.project_idea, 
+                                                                  text)
+
+        results = await self.stage_executor.map("Generate Solutions", 
+                                                state.summarized_pain_points.summarized_pain_points, 
+                                                generate_theme_solution)
+        all_llm_solutions = [llm_solution for llm_solution in results if llm_solution is not None]
         
         logger.info(f"Found {len(all_llm_solutions)} LLM solutions")
         logger.info(f"LLM solutions length : {sum(len(s) for s in all_llm_solutions)}")
         self._update_progress("Generate Solutions", f"Found {len(all_llm_solutions)} LLM solutions")
-        state.llm_solutions = all_llm_solutions 
+        return {"llm_solutions": all_llm_solutions}
 
-        #summarize llm solutions  
+    async def _summarize_solutions(self, state: ResearchState) -> ResearchState: 
+        """Summarize the AI solutions together with the ones found on Reddit""" 
         logger.info(f"Summarizing LLM solutions...") 
         self._update_progress("Generate Solutions", "Summarizing LLM solutions...")
         llm_solutions_summary = await self.llm_manager.summarize_llm_solutions(state.project_idea, 
-                                                                              all_llm_solutions,
-                                                                              all_summarized_pain_points,
-                                                                              reddit_solutions)
+                                                                              state.llm_solutions,
+                                                                              self._format_summarized_pain_points(state),
+                                                                              state.reddit_solutions)
         state.summarized_llm_solutions = llm_solutions_summary
         self._update_progress("Generate Solutions", "LLM solutions summarized")
         return state
@@ -375,27 +538,71 @@ class RedditResearchAgent:
         logger.info("Generating report...") 
         self._update_progress("Generate Report", "Generating report...")
 
-        viz_files = self.report_manager.generate_visualizations()
         markdown_content = self.report_manager.generate_markdown(state)
-        pdf_path = self.report_manager.generate_pdf_report(markdown_content, viz_files)
+        pdf_path = self.report_manager.generate_pdf_report(markdown_content, state.visualization_files)
 
         self._update_progress("Generate Report", "Report generated")
 
         state.report_path = pdf_path
         return state
 
-    async def run_research(self, project_id: str, project_idea: str, config: Dict[str, Any]) -> Dict[str, Any]:
-        """Run the complete research workflow"""
+    async def _invoke_workflow(self, initial_state: ResearchState, resume: bool) -> Dict[str, Any]:
+        """Run the workflow with per-node checkpoints in projects/<id>/checkpoints.sqlite.
+
+        With resume, an interrupted run restarts at its first incomplete node from the
+        checkpointed state. A new run starts instead, dropping the old checkpoints, when
+        resume is off, the last run finished, or the idea, config or workflow graph
+        (batch or streaming) have changed since.
+        """
+        if AsyncSqliteSaver is None:
+            logger.warning("langgraph-checkpoint-sqlite not installed, running without checkpoints")
+            return await self.workflow.ainvoke(initial_state)
+
+        checkpoint_path = os.path.join(self.projects_path, str(initial_state.project_id), "checkpoints.sqlite")
+        os.makedirs(os.path.dirname(checkpoint_path), exist_ok=True)
+        thread_config = {"configurable": {"thread_id": "research"}}
+
+        if resume and os.path.exists(checkpoint_path):
+            async with AsyncSqliteSaver.from_conn_string(checkpoint_path) as checkpointer:
+                workflow = self._build_workflow(checkpointer)
+                snapshot = await workflow.aget_state(thread_config)
+                unchanged = (snapshot.values.get("project_idea") == initial_state.project_idea
+                             and snapshot.values.get("config") == initial_state.config
+                             and snapshot.values.get("workflow_topology") == initial_state.workflow_topology)
+                if snapshot.next and unchanged:
+                    logger.info(f"Resuming research at: {', '.join(snapshot.next)}")
+                    return await workflow.ainvoke(None, thread_config)
+                if snapshot.next:
+                    logger.warning("Project idea, config or workflow mode changed since the interrupted run, "
+                                   "starting a new run")
+                else:
+                    logger.info("No interrupted run to resume, starting a new run")
+
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(checkpoint_path + suffix):
+                os.remove(checkpoint_path + suffix)
+
+        async with AsyncSqliteSaver.from_conn_string(checkpoint_path) as checkpointer:
+            return await self._build_workflow(checkpointer).ainvoke(initial_state, thread_config)
+
+    async def run_research(self, project_id: str, project_idea: str, config: Dict[str, Any], 
+                           resume: bool = False) -> Dict[str, Any]:
+        """Run the complete research workflow, or resume the last interrupted run of the project"""
         logger.info(f"Starting research for project: {project_id} - {project_idea}")
 
         #initialize state 
         initial_state = ResearchState(
             project_id=project_id,
             project_idea=project_idea,
-            config=config
+            config=config,
+            workflow_topology=self.workflow_topology
         )
         
-        final_state = await self.workflow.ainvoke(initial_state)
+        self.workflow_timer.reset()
+        # Dedup reads the stored vectors once per run, not once per stored batch
+        self.vector_db.reset_project_vectors(project_id)
+        final_state = await self._invoke_workflow(initial_state, resume)
+        timing = self.workflow_timer.report(self.workflow_dependencies)
         logger.info(f"Research complete!")
 
         # Save final state as pretty JSON
@@ -420,9 +627,12 @@ class RedditResearchAgent:
                 "subreddits_found": len(final_state["subreddits"]),
                 "posts_found": len(final_state["reddit_posts"]),
                 "filtered_posts": len(final_state["filtered_posts"]),
-                "comments_found": len(final_state["reddit_comments"]),
+                "comments_found": ResearchState.model_validate(final_state).num_comments(),
                 "pain_points_identified": len(final_state["pain_points"]),
-            }
+            },
+            "llm_cache": self.llm_manager.cache_stats(),
+            "token_usage": self.llm_manager.token_usage_stats(),
+            "timing": timing
         }
 
         return response
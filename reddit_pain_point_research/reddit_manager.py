@@ -1,15 +1,21 @@
 import os
-from datetime import datetime
+import time
+import random
+import threading
+from functools import partial
+from concurrent.futures import ThreadPoolExecutor
 
 import praw
-from prawcore.exceptions import ResponseException, RequestException
+from prawcore.exceptions import ResponseException, RequestException, TooManyRequests
 
 from pydantic import BaseModel, Field 
-from typing import Optional, List
+from typing import Optional, List, Tuple, AsyncIterator
 import asyncio
 import logging
 from collections import Counter, defaultdict
 from json_schemas import RedditPost, RedditComment
+from rate_limiter import AsyncTokenBucket
+from reddit_store import RedditCorpusStore
 from dotenv import load_dotenv
 load_dotenv() 
 
@@ -21,70 +27,198 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+DEFAULT_SEARCH_STRATEGIES = [
+    ("relevance", "all"),
+    ("top", "month"),
+    ("new", None)
+]
 
 
 class RedditAPIManager:
     """Manages Reddit API interactions with rate limiting""" 
 
-    def __init__(self):
-        self.reddit = praw.Reddit(
-            client_id=os.getenv("REDDIT_CLIENT_ID"),
-            client_secret=os.getenv("REDDIT_CLIENT_SECRET"),
-            user_agent=os.getenv("REDDIT_USER_AGENT"),
-        )
+    def __init__(self, corpus_path: str = None, offline: bool = None):
+        # Offline runs replay the local corpus and never touch the Reddit API
+        if offline is None:
+            offline = os.getenv("REDDIT_OFFLINE", "false").lower() == "true"
+        self.offline = offline
 
-        self.last_request_time = 0
-        self.min_request_interval = 0.65 # 90 requests per minute 
+        # praw.Reddit is not thread-safe: each executor thread builds its own client on first use
+        self._thread_local = threading.local()
+        self._limits_lock = threading.Lock()
+        self._latest_limits = None
+
+        # Local corpus of fetched posts and comments, re-synced after the refresh interval
+        if corpus_path is None:
+            corpus_path = os.getenv("REDDIT_CORPUS_PATH")
+        self.corpus = RedditCorpusStore(corpus_path) if corpus_path else None
+        if self.offline and self.corpus is None:
+            raise ValueError("Offline mode requires a Reddit corpus path (REDDIT_CORPUS_PATH)")
+        self.corpus_refresh_seconds = float(os.getenv("REDDIT_CORPUS_REFRESH_HOURS", 24)) * 3600
+
+        # Shared by every coroutine so concurrent searches stay within Reddit's QPM
+        self.rate_limiter = AsyncTokenBucket(rate_per_minute=float(os.getenv("REDDIT_MAX_QPM", 100)))
+
+        # PRAW is blocking, run its calls off the event loop
+        self.executor = ThreadPoolExecutor(max_workers=int(os.getenv("REDDIT_MAX_WORKERS", 8)))
+
+        self.max_retries = 5
+        self.backoff_base = 2.0
+        self.backoff_max = 60.0
+
+    @property
+    def reddit(self) -> praw.Reddit:
+        """PRAW client of the calling thread"""
+        reddit = getattr(self._thread_local, "reddit", None)
+        if reddit is None:
+            reddit = praw.Reddit(
+                client_id=os.getenv("REDDIT_CLIENT_ID"),
+                client_secret=os.getenv("REDDIT_CLIENT_SECRET"),
+                user_agent=os.getenv("REDDIT_USER_AGENT"),
+            )
+            self._thread_local.reddit = reddit
+        return reddit
+
+    def _call_in_thread(self, func, *args, **kwargs):
+        """Run a PRAW call on an executor thread and keep the rate limits its response reported"""
+        try:
+            return func(*args, **kwargs)
+        finally:
+            limits = dict(self.reddit.auth.limits)
+            with self._limits_lock:
+                self._latest_limits = limits
+
+    def _update_rate_limits(self):
+        """Feed X-Ratelimit-Remaining/Reset (tracked by PRAW) into the token bucket"""
+        with self._limits_lock:
+            limits = self._latest_limits
+        if limits is None:
+            return
+        remaining = limits.get("remaining")
+        reset_timestamp = limits.get("reset_timestamp")
+        if remaining is not None and reset_timestamp is not None:
+            self.rate_limiter.update_from_headers(remaining, reset_timestamp - time.time())
     
     async def rate_limited_request(self, func, *args, **kwargs):
         """Rate limit requests to Reddit API""" 
-        current_time = datetime.now().timestamp()
-        time_since_last = current_time - self.last_request_time
+        loop = asyncio.get_running_loop()
+        for attempt in range(self.max_retries + 1):
+            await self.rate_limiter.acquire()
+            try:
+                result = await loop.run_in_executor(self.executor, partial(self._call_in_thread, func, *args, **kwargs))
+                self._update_rate_limits()
+                return result
+            
+            except (ResponseException, RequestException) as e:
+                logger.error(f"Reddit API error: {e}")
+                self._update_rate_limits()
+                is_rate_limited = isinstance(e, TooManyRequests) or "rate limit" in str(e).lower()
+                if not is_rate_limited or attempt == self.max_retries:
+                    raise e
 
-        if time_since_last < self.min_request_interval:
-            await asyncio.sleep(self.min_request_interval - time_since_last)
-        
-        try:
-            result = func(*args, **kwargs) 
-            self.last_request_time = datetime.now().timestamp()
-            return result
-        
-        except (ResponseException, RequestException) as e:
-            logger.error(f"Reddit API error: {e}")
-            if "rate limit" in str(e).lower():
-                await asyncio.sleep(60)
-                return await self.rate_limited_request(func, *args, **kwargs)
-            raise e
+                delay = min(self.backoff_max, self.backoff_base * 2 ** attempt) * random.uniform(0.5, 1.0)
+                logger.info(f"Rate limited, retrying in {delay:.1f}s ({attempt+1}/{self.max_retries})")
+                await asyncio.sleep(delay)
+
+    def _search(self, subreddit: str, **kwargs) -> list:
+        """Run a subreddit search and fetch the whole listing"""
+        return list(self.reddit.subreddit(subreddit).search(**kwargs))
+
+    def _fetch_comments(self, post_id: str) -> list:
+        """Fetch the flattened comment tree of a submission"""
+        submission = self.reddit.submission(post_id)
+        submission.comments.replace_more(limit=0)
+        return submission.comments.list()
+
+    def _is_fresh(self, synced_at: Optional[float]) -> bool:
+        return synced_at is not None and time.time() - synced_at < self.corpus_refresh_seconds
+
+    async def _search_posts(self, query: str, sub: str, sort: str, time_filter: Optional[str], limit: int) -> List[RedditPost]:
+        """Search posts through the local corpus, fetching from Reddit only what is missing or stale"""
+        query_key = None
+        cached_posts = []
+        search_kwargs = {"query": query, "limit": limit, "sort": sort}
+        if time_filter is not None:
+            search_kwargs["time_filter"] = time_filter
+
+        if self.corpus is not None:
+            query_key = self.corpus.query_key(query, sub, sort, time_filter, limit)
+            synced_at = self.corpus.get_search_sync(query_key)
+            if self.offline:
+                if synced_at is None:
+                    return self.corpus.search_posts(query, sub, limit)
+                return self.corpus.get_search_posts(query_key)
+            if self._is_fresh(synced_at):
+                return self.corpus.get_search_posts(query_key)
+
+            if synced_at is not None and sort == "new":
+                # Newest-first listing: only ask for posts newer than the last sync
+                cached_posts = self.corpus.get_search_posts(query_key)
+                if cached_posts:
+                    search_kwargs["params"] = {"before": f"t3_{cached_posts[0].id}"}
+
+        submissions = await self.rate_limited_request(self._search, sub, **search_kwargs)
+
+        posts = []
+        for post in submissions:
+            posts.append(
+                RedditPost(
+                    id=post.id,
+                    title=post.title,
+                    content=post.selftext,
+                    subreddit=post.subreddit.display_name,
+                    score=post.score,
+                    num_comments=post.num_comments,
+                    created_utc=post.created_utc,
+                    url=post.url,
+                    author=str(post.author),
+                    flair=post.link_flair_text
+                )
+            )
+
+        if cached_posts:
+            new_ids = {post.id for post in posts}
+            posts = (posts + [post for post in cached_posts if post.id not in new_ids])[:limit]
+
+        if self.corpus is not None:
+            self.corpus.save_search(query_key, posts)
+        return posts
 
     async def get_subreddits(self, keywords: List[str]) -> List[str]:
         """Get subreddits from keywords"""
-        all_subreddits = []
-        for keyword in keywords:
-            subreddit = await self.rate_limited_request(self.reddit.subreddit('all').search,
-                                                        query=keyword,
-                                                        sort = "relevance",
-                                                        time_filter = "all",
-                                                        limit = 100)
+
+        async def keyword_subreddits(keyword):
+            subreddit = await self._search_posts(keyword, 'all', "relevance", "all", 100)
             counter = Counter()
             for post in subreddit: 
-                counter[post.subreddit.display_name] += 1 
-            subreddits = [sub for sub, count in counter.most_common(2)]
+                counter[post.subreddit] += 1 
+            return [sub for sub, count in counter.most_common(2)]
+
+        results = await asyncio.gather(*(keyword_subreddits(keyword) for keyword in keywords))
+
+        all_subreddits = []
+        for subreddits in results:
             all_subreddits.extend(subreddits)
         return list(set(all_subreddits))
     
     async def get_post_comments(self, post_id: str, limit: int = 50, min_comment_score: int = 2) -> List[RedditComment]:
         """Get comments for a specific post"""
-        comments = []
-
         try:
-            submission = await self.rate_limited_request(
-                self.reddit.submission,
+            if self.corpus is not None:
+                synced_at = self.corpus.get_comment_sync(post_id)
+                if self.offline or self._is_fresh(synced_at):
+                    all_comments = self.corpus.get_comments(post_id)
+                    return [comment for comment in all_comments if comment.score >= min_comment_score][:limit]
+
+            submission_comments = await self.rate_limited_request(
+                self._fetch_comments,
                 post_id
             )
 
-            submission.comments.replace_more(limit=0)
-            for comment in submission.comments.list():
-                if comment.score >= min_comment_score and len(comments) < limit and hasattr(comment, 'body') and comment.body not in ("[deleted]", "[removed]") and comment.author is not None:
+            # Keep every valid comment so later runs can apply other score/limit settings
+            all_comments = []
+            for comment in submission_comments:
+                if hasattr(comment, 'body') and comment.body not in ("[deleted]", "[removed]") and comment.author is not None:
                     reddit_comment = RedditComment(
                         id=comment.id,
                         post_id=post_id,
@@ -97,73 +231,76 @@ class RedditAPIManager:
                         upvotes=comment.ups,
                         downvotes=comment.downs
                     )
-                    comments.append(reddit_comment)
+                    all_comments.append(reddit_comment)
+
+            if self.corpus is not None:
+                self.corpus.save_comments(post_id, all_comments)
 
-            return comments
+            return [comment for comment in all_comments if comment.score >= min_comment_score][:limit]
         
         except Exception as e:
             logger.error(f"Error getting comments for post {post_id}: {e}")
             return []
                 
-    async def search_subreddits(self, subreddits: List[str], query: str, limit: int = 10, 
-                                 min_post_score: int = 10,
-                                 num_comments: int = 5,
-                                 strategies = [
-                                     ("relevance", "all"),
-                                     ("top", "month"),
-                                     ("new", None)
-                                     ]) -> List[RedditPost]:
-        """Search Reddit posts with rate limiting"""
-        all_posts = []
-
+    async def _run_search_query(self, query: str, sub: str, sort: str, time_filter: Optional[str], 
+                                limit: int, min_post_score: int, num_comments: int) -> List[RedditPost]:
+        """Run one planned search query and keep the posts that pass the score filters"""
         try:
-            for sub in subreddits:
-                #logger.info(f"Searching {sub} with {query}")
-                for sort, time_filter in strategies:
-                    subreddit = self.reddit.subreddit(sub) 
-                    if time_filter is None:
-                        posts = await self.rate_limited_request( 
-                            subreddit.search,
-                            query=query,
-                            limit=limit,
-                            sort=sort
-                        )
-                    else:
-                        posts = await self.rate_limited_request( 
-                            subreddit.search,
-                            query=query,
-                            limit=limit,
-                            sort=sort,
-                            time_filter=time_filter 
-                        )
-                    for post in posts:
-                        if post.score < min_post_score or post.num_comments < num_comments:
-                            continue
-
-                        post_data = RedditPost(
-                            id=post.id,
-                            title=post.title,
-                            content=post.selftext,
-                            subreddit=post.subreddit.display_name,
-                            score=post.score,
-                            num_comments=post.num_comments,
-                            created_utc=post.created_utc,
-                            url=post.url,
-                            author=str(post.author),
-                            flair=post.link_flair_text
-                        )
-                        all_posts.append(post_data)
-
-            return all_posts
-        
+            posts = await self._search_posts(query, sub, sort, time_filter, limit)
         except Exception as e:
             logger.error(f"Error searching Reddit: {e}")
             return []
+
+        return [post for post in posts if post.score >= min_post_score and post.num_comments >= num_comments]
+
+    @staticmethod
+    def plan_search_queries(keywords: List[str], subreddits: List[str], 
+                            strategies: List[Tuple[str, Optional[str]]] = DEFAULT_SEARCH_STRATEGIES) -> List[Tuple[str, str, str, Optional[str]]]:
+        """Build the keyword x subreddit x strategy grid without repeated queries"""
+        queries = []
+        seen = set()
+        for keyword in keywords:
+            for sub in subreddits:
+                for sort, time_filter in strategies:
+                    query_key = (keyword.strip().lower(), sub.lower(), sort, time_filter)
+                    if query_key in seen:
+                        continue
+                    seen.add(query_key)
+                    queries.append((keyword.strip(), sub, sort, time_filter))
+        return queries
+
+    async def stream_search(self, keywords: List[str], subreddits: List[str], limit: int = 10, 
+                            min_post_score: int = 10,
+                            num_comments: int = 5,
+                            strategies: List[Tuple[str, Optional[str]]] = DEFAULT_SEARCH_STRATEGIES) -> AsyncIterator[RedditPost]:
+        """Run the whole search grid concurrently and yield unique posts as queries complete"""
+        queries = self.plan_search_queries(keywords, subreddits, strategies)
+        logger.info(f"Planned {len(queries)} search queries for {len(keywords)} keywords and {len(subreddits)} subreddits")
+
+        tasks = [
+            asyncio.ensure_future(self._run_search_query(query, sub, sort, time_filter, limit, min_post_score, num_comments))
+            for query, sub, sort, time_filter in queries
+        ]
+        seen_posts = set()
+        try:
+            for task in asyncio.as_completed(tasks):
+                for post in await task:
+                    if post.id in seen_posts:
+                        continue
+                    seen_posts.add(post.id)
+                    yield post
+        finally:
+            for task in tasks:
+                task.cancel()
             
 if __name__ == "__main__":
     reddit_manager = RedditAPIManager()
-    subreddits = asyncio.run(reddit_manager.get_subreddits(["ai agent error"]))
-    all_posts = asyncio.run(reddit_manager._search_subreddits(subreddits, "ai agent error")) 
+
+    async def search(keywords):
+        subreddits = await reddit_manager.get_subreddits(keywords)
+        return [post async for post in reddit_manager.stream_search(keywords, subreddits)]
+
+    all_posts = asyncio.run(search(["ai agent error"]))
     for post in all_posts:
         print(f"Title: {post.title}")
         print(f"Subreddit: {post.subreddit}")
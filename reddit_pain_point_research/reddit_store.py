@@ -0,0 +1,171 @@
+import json
+import os
+import sqlite3
+import time
+from typing import List, Optional
+
+from json_schemas import RedditPost, RedditComment
+
+import logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+    datefmt='%Y-%m-%d %H:%M:%S'
+)
+logger = logging.getLogger(__name__)
+
+
+class RedditCorpusStore:
+    """Local SQLite corpus of Reddit posts and comments with full-text search"""
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        db_dir = os.path.dirname(db_path)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS posts (
+                id TEXT PRIMARY KEY,
+                subreddit TEXT NOT NULL,
+                data TEXT NOT NULL,
+                created_utc REAL NOT NULL,
+                fetched_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS comments (
+                id TEXT PRIMARY KEY,
+                post_id TEXT NOT NULL,
+                position INTEGER NOT NULL,
+                data TEXT NOT NULL,
+                created_utc REAL NOT NULL,
+                fetched_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_comments_post_id ON comments (post_id, position);
+            CREATE TABLE IF NOT EXISTS comment_syncs (
+                post_id TEXT PRIMARY KEY,
+                synced_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS search_syncs (
+                query_key TEXT PRIMARY KEY,
+                synced_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS search_results (
+                query_key TEXT NOT NULL,
+                position INTEGER NOT NULL,
+                post_id TEXT NOT NULL,
+                PRIMARY KEY (query_key, position)
+            );
+            """
+        )
+
+        try:
+            self.conn.execute(
+                "CREATE VIRTUAL TABLE IF NOT EXISTS posts_fts USING fts5(id UNINDEXED, subreddit UNINDEXED, title, content)"
+            )
+            self.fts_enabled = True
+        except sqlite3.OperationalError as e:
+            logger.warning(f"SQLite FTS5 unavailable, offline search falls back to LIKE: {e}")
+            self.fts_enabled = False
+        self.conn.commit()
+
+    @staticmethod
+    def query_key(query: str, subreddit: str, sort: str, time_filter: Optional[str], limit: int) -> str:
+        return json.dumps([query.strip().lower(), subreddit.lower(), sort, time_filter, limit])
+
+    def save_posts(self, posts: List[RedditPost]):
+        now = time.time()
+        for post in posts:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO posts (id, subreddit, data, created_utc, fetched_at) VALUES (?, ?, ?, ?, ?)",
+                (post.id, post.subreddit, post.model_dump_json(), post.created_utc, now)
+            )
+            if self.fts_enabled:
+                self.conn.execute("DELETE FROM posts_fts WHERE id = ?", (post.id,))
+                self.conn.execute(
+                    "INSERT INTO posts_fts (id, subreddit, title, content) VALUES (?, ?, ?, ?)",
+                    (post.id, post.subreddit, post.title, post.content)
+                )
+        self.conn.commit()
+
+    def save_search(self, query_key: str, posts: List[RedditPost]):
+        """Store the posts of a search query in listing order and mark it synced"""
+        self.save_posts(posts)
+        self.conn.execute("DELETE FROM search_results WHERE query_key = ?", (query_key,))
+        self.conn.executemany(
+            "INSERT INTO search_results (query_key, position, post_id) VALUES (?, ?, ?)",
+            [(query_key, position, post.id) for position, post in enumerate(posts)]
+        )
+        self.conn.execute(
+            "INSERT OR REPLACE INTO search_syncs (query_key, synced_at) VALUES (?, ?)", (query_key, time.time())
+        )
+        self.conn.commit()
+
+    def get_search_sync(self, query_key: str) -> Optional[float]:
+        row = self.conn.execute("SELECT synced_at FROM search_syncs WHERE query_key = ?", (query_key,)).fetchone()
+        return row[0] if row else None
+
+    def get_search_posts(self, query_key: str) -> List[RedditPost]:
+        rows = self.conn.execute(
+            """SELECT posts.data FROM search_results
+               JOIN posts ON posts.id = search_results.post_id
+               WHERE search_results.query_key = ? ORDER BY search_results.position""",
+            (query_key,)
+        ).fetchall()
+        return [RedditPost.model_validate_json(row[0]) for row in rows]
+
+    def search_posts(self, query: str, subreddit: str, limit: int) -> List[RedditPost]:
+        """Full-text search of stored posts, used when replaying offline"""
+        if self.fts_enabled:
+            # Quote each term so user keywords cannot inject FTS5 syntax
+            terms = " OR ".join('"' + term.replace('"', '""') + '"' for term in query.split())
+            if not terms:
+                return []
+            sql = """SELECT posts.data FROM posts_fts JOIN posts ON posts.id = posts_fts.id
+                     WHERE posts_fts MATCH ?"""
+            params = [terms]
+            if subreddit.lower() != "all":
+                sql += " AND lower(posts.subreddit) = lower(?)"
+                params.append(subreddit)
+            sql += " ORDER BY posts_fts.rank LIMIT ?"
+        else:
+            sql = "SELECT data FROM posts WHERE data LIKE ?"
+            params = [f"%{query}%"]
+            if subreddit.lower() != "all":
+                sql += " AND lower(subreddit) = lower(?)"
+                params.append(subreddit)
+            sql += " ORDER BY created_utc DESC LIMIT ?"
+        params.append(limit)
+        rows = self.conn.execute(sql, params).fetchall()
+        return [RedditPost.model_validate_json(row[0]) for row in rows]
+
+    def save_comments(self, post_id: str, comments: List[RedditComment]):
+        """Replace the stored comment tree of a post and mark it synced"""
+        now = time.time()
+        self.conn.execute("DELETE FROM comments WHERE post_id = ?", (post_id,))
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO comments (id, post_id, position, data, created_utc, fetched_at) VALUES (?, ?, ?, ?, ?, ?)",
+            [
+                (comment.id, post_id, position, comment.model_dump_json(), comment.created_utc, now)
+                for position, comment in enumerate(comments)
+            ]
+        )
+        self.conn.execute(
+            "INSERT OR REPLACE INTO comment_syncs (post_id, synced_at) VALUES (?, ?)", (post_id, now)
+        )
+        self.conn.commit()
+
+    def get_comment_sync(self, post_id: str) -> Optional[float]:
+        row = self.conn.execute("SELECT synced_at FROM comment_syncs WHERE post_id = ?", (post_id,)).fetchone()
+        return row[0] if row else None
+
+    def get_comments(self, post_id: str) -> List[RedditComment]:
+        rows = self.conn.execute(
+            "SELECT data FROM comments WHERE post_id = ? ORDER BY position", (post_id,)
+        ).fetchall()
+        return [RedditComment.model_validate_json(row[0]) for row in rows]
+
+    def close(self):
+        self.conn.close()
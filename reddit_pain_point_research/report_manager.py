@@ -1,12 +1,14 @@
 from datetime import datetime
 import logging
-from typing import List, Dict
+from typing import Any, List, Dict, Optional
 from json_schemas import PainPoint, ResearchState
-import matplotlib.pyplot as plt
+import matplotlib.style
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
 import pandas as pd
 import os
 from wordcloud import WordCloud
-from vector_manager import VectorDBManager
+from vector_manager import REPORT_PAYLOAD_FIELDS, VectorDBManager
 import markdown
 import base64
 from weasyprint import HTML, CSS
@@ -18,6 +20,10 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Set once at import: charts are rendered off the main thread with the Figure API,
+# which unlike pyplot keeps no global state
+matplotlib.style.use('seaborn-v0_8')
+
 
 class ReportGenerator:
     """Generates a report of the research"""
@@ -31,28 +37,34 @@ class ReportGenerator:
 
         self.vector_db = vector_db
         
-    def generate_visualizations(self) -> Dict[str, str]:
-        """Generate visualizations for the report"""
-
-        unique_pain_points = self.vector_db.get_unique_pain_points(
-            project_id=self.project_id
-        )
+    @staticmethod
+    def _save_figure(fig: Figure, path: str):
+        FigureCanvasAgg(fig)
+        fig.savefig(path, dpi=300, bbox_inches='tight')
+
+    def generate_visualizations(self, unique_pain_points: Optional[List[Dict[str, Any]]] = None) -> Dict[str, str]:
+        """Generate visualizations for the report, safe to call from a worker thread"""
+
+        if unique_pain_points is None:
+            unique_pain_points = self.vector_db.get_unique_pain_points(
+                project_id=self.project_id,
+                payload_fields=REPORT_PAYLOAD_FIELDS
+            )
         logger.info(f"Found {len(unique_pain_points)} unique pain points")
 
-        plt.style.use('seaborn-v0_8')
         viz_files = {}
 
         categories = [pp["category"] for pp in unique_pain_points]
         category_counts = pd.Series(categories).value_counts()
 
-        fig, ax = plt.subplots(figsize=(10, 8))
+        fig = Figure(figsize=(10, 8))
+        ax = fig.subplots()
         ax.pie(category_counts.values, 
                labels=category_counts.index, 
                autopct='%1.1f%%')
         ax.set_title('Pain Points by Category')
         viz_files['categories'] = os.path.join(self.visualizations_path, f'pain_points_categories_{self.timestamp}.png')
-        plt.savefig(viz_files['categories'], dpi=300, bbox_inches='tight')
-        plt.close()
+        self._save_figure(fig, viz_files['categories'])
 
         # Word cloud
         all_text = ' '.join([pp["content"] for pp in unique_pain_points])
@@ -61,20 +73,21 @@ class ReportGenerator:
             height=400, 
             max_words=100,
             background_color='white').generate(all_text)
-        fig, ax = plt.subplots(figsize=(12, 6))
+        fig = Figure(figsize=(12, 6))
+        ax = fig.subplots()
         ax.imshow(wordcloud, interpolation='bilinear')
         ax.axis('off')
         ax.set_title('Pain Points Word Cloud')
         viz_files['wordcloud'] = os.path.join(self.visualizations_path, f'wordcloud_{self.timestamp}.png')
-        plt.savefig(viz_files['wordcloud'], dpi=300, bbox_inches='tight')
-        plt.close()
+        self._save_figure(fig, viz_files['wordcloud'])
 
         return viz_files
 
     def generate_markdown_report(self, state: ResearchState, viz_files: Dict[str, str]) -> str:
         """Generate a markdown report of the research"""
         unique_pain_points = self.vector_db.get_unique_pain_points(
-            project_id=self.project_id
+            project_id=self.project_id,
+            payload_fields=REPORT_PAYLOAD_FIELDS
         )
 
         report = f"""# Reddit Market Research Report
@@ -84,12 +97,12 @@ class ReportGenerator:
 **Generated On:** {datetime.now().strftime("%Y-%m-%d %H:%M:%S")}
 **Keywords:** {state.keywords}
 **Total Posts Analyzed:** {len(state.reddit_posts)}
-**Total Comments Analyzed:** {len(state.reddit_comments)}
+**Total Comments Analyzed:** {state.num_comments()}
 **Pain Points Identified:** {len(unique_pain_points)}
 
 ## Executive Summary
 This report presents a comprehensive analysis of Reddit discussions related to "{state.project_idea}".
-We analyzed {len(state.reddit_posts)} posts and {len(state.reddit_comments)} comments to identify {len(unique_pain_points)} unique pain points.
+We analyzed {len(state.reddit_posts)} posts and {state.num_comments()} comments to identify {len(unique_pain_points)} unique pain points.
 
 ## Key Findings
 
@@ -135,7 +148,8 @@ We analyzed {len(state.reddit_posts)} posts and {len(state.reddit_comments)} com
     def generate_markdown(self, state: ResearchState) -> str:
         """Generate a markdown report of the research from LLM"""
         unique_pain_points = self.vector_db.get_unique_pain_points(
-            project_id=state.project_id
+            project_id=state.project_id,
+            payload_fields=REPORT_PAYLOAD_FIELDS
         )
 
         report = f"""# Reddit Market Research Report 
@@ -144,12 +158,12 @@ We analyzed {len(state.reddit_posts)} posts and {len(state.reddit_comments)} com
 **Generated On:** {datetime.now().strftime("%Y-%m-%d %H:%M:%S")}
 **Keywords:** {", ".join(state.keywords)}
 **Total Posts Analyzed:** {len(state.reddit_posts)}
-**Total Comments Analyzed:** {len(state.reddit_comments)}
+**Total Comments Analyzed:** {state.num_comments()}
 **Pain Points Identified:** {len(unique_pain_points)}
 
 ## Executive Summary
 This report presents a comprehensive analysis of Reddit discussions related to "{state.project_idea}".
-We analyzed {len(state.reddit_posts)} posts and {len(state.reddit_comments)} comments to identify {len(unique_pain_points)} unique pain points. 
+We analyzed {len(state.reddit_posts)} posts and {state.num_comments()} comments to identify {len(unique_pain_points)} unique pain points. 
 
 ## Summary of Pain Points 
 """ 
@@ -0,0 +1,69 @@
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, List, Optional
+
+import logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+    datefmt='%Y-%m-%d %H:%M:%S'
+)
+logger = logging.getLogger(__name__)
+
+
+class StageExecutor:
+    """Runs the per-item tasks of a workflow stage on a bounded worker pool"""
+
+    def __init__(self, width: int = 8, progress_callback=None):
+        self.width = max(1, width)
+        self.progress_callback = progress_callback
+
+    def _update_progress(self, step_name, details=None):
+        if self.progress_callback:
+            self.progress_callback(step_name, details)
+
+    async def map(self, step_name: str, items: List[Any], func: Callable[[Any], Awaitable[Any]]) -> List[Optional[Any]]:
+        """Apply func to every item concurrently.
+
+        Results are returned in input order. An item whose task raises is logged
+        and yields None so a single failure does not abort the whole stage.
+        """
+        results: List[Optional[Any]] = [None] * len(items)
+        if not items:
+            return results
+
+        queue = asyncio.Queue()
+        for index, item in enumerate(items):
+            queue.put_nowait((index, item))
+
+        start_time = time.perf_counter()
+        completed = 0
+        failed = 0
+
+        async def worker():
+            nonlocal completed, failed
+            while True:
+                try:
+                    index, item = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+
+                try:
+                    results[index] = await func(item)
+                except Exception as e:
+                    failed += 1
+                    logger.error(f"{step_name}: item {index} failed: {e}")
+
+                completed += 1
+                elapsed = time.perf_counter() - start_time
+                rate = completed / elapsed if elapsed > 0 else 0.0
+                self._update_progress(step_name, f"{completed}/{len(items)} items ({rate:.2f} items/sec)")
+
+        num_workers = min(self.width, len(items))
+        await asyncio.gather(*(worker() for _ in range(num_workers)))
+
+        elapsed = time.perf_counter() - start_time
+        rate = len(items) / elapsed if elapsed > 0 else 0.0
+        logger.info(f"{step_name}: processed {len(items)} items in {elapsed:.2f}s ({rate:.2f} items/sec, {failed} failed)")
+
+        return results
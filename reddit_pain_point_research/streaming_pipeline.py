@@ -0,0 +1,127 @@
+import asyncio
+import time
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List
+
+import logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+    datefmt='%Y-%m-%d %H:%M:%S'
+)
+logger = logging.getLogger(__name__)
+
+_END_OF_STREAM = object()
+
+
+class StreamingPipeline:
+    """Chains async stages with bounded queues so each item moves on as soon as it is processed.
+
+    A stage function takes one item (or a list of items for batch stages) and returns
+    the list of items to pass downstream. The bounded queues apply backpressure, so
+    only a few items per stage are in flight at any time.
+    """
+
+    def __init__(self, queue_size: int = 16, progress_callback=None):
+        self.queue_size = max(1, queue_size)
+        self.progress_callback = progress_callback
+        self.stages: List[Dict[str, Any]] = []
+
+    def add_stage(self, name: str, func: Callable[[Any], Awaitable[List[Any]]], workers: int = 1,
+                  batch_size: int = None) -> "StreamingPipeline":
+        """Append a stage; with batch_size, func receives up to that many queued items at once"""
+        self.stages.append({
+            "name": name,
+            "func": func,
+            "workers": max(1, workers),
+            "batch_size": batch_size,
+        })
+        return self
+
+    def _update_progress(self, step_name, details=None):
+        if self.progress_callback:
+            self.progress_callback(step_name, details)
+
+    async def run(self, source: AsyncIterator[Any]) -> Dict[str, Any]:
+        """Feed every item of source through the stages and return per-stage statistics"""
+        queues = [asyncio.Queue(maxsize=self.queue_size) for _ in self.stages]
+        stats = {
+            stage["name"]: {"processed": 0, "failed": 0, "outputs": 0, "first_output": None, "peak_queue": 0}
+            for stage in self.stages
+        }
+        start_time = time.perf_counter()
+        source_count = 0
+
+        async def feed():
+            nonlocal source_count
+            async for item in source:
+                source_count += 1
+                await queues[0].put(item)
+            for _ in range(self.stages[0]["workers"]):
+                await queues[0].put(_END_OF_STREAM)
+
+        async def take_batch(stage_queue: asyncio.Queue, batch_size: int) -> List[Any]:
+            # Block for the first item, then drain whatever else is already waiting
+            batch = [await stage_queue.get()]
+            while len(batch) < batch_size and batch[-1] is not _END_OF_STREAM:
+                try:
+                    batch.append(stage_queue.get_nowait())
+                except asyncio.QueueEmpty:
+                    break
+            return batch
+
+        async def worker(index: int):
+            stage = self.stages[index]
+            stage_stats = stats[stage["name"]]
+            next_queue = queues[index + 1] if index + 1 < len(queues) else None
+
+            while True:
+                stage_stats["peak_queue"] = max(stage_stats["peak_queue"], queues[index].qsize())
+                batch = await take_batch(queues[index], stage["batch_size"] or 1)
+                done = batch[-1] is _END_OF_STREAM
+                items = batch[:-1] if done else batch
+
+                if items:
+                    try:
+                        outputs = await stage["func"](items if stage["batch_size"] else items[0])
+                    except Exception as e:
+                        stage_stats["failed"] += len(items)
+                        logger.error(f"{stage['name']}: failed on {len(items)} item(s): {e}")
+                        outputs = []
+
+                    stage_stats["processed"] += len(items)
+                    stage_stats["outputs"] += len(outputs or [])
+                    if outputs and stage_stats["first_output"] is None:
+                        stage_stats["first_output"] = time.perf_counter() - start_time
+                    if next_queue is not None:
+                        for output in outputs or []:
+                            await next_queue.put(output)
+                    self._update_progress(stage["name"], f"{stage_stats['processed']} processed, "
+                                                         f"{stage_stats['outputs']} passed on")
+                if done:
+                    return
+
+        async def run_stage(index: int):
+            await asyncio.gather(*(worker(index) for _ in range(self.stages[index]["workers"])))
+            # Every worker of this stage is done: close the next stage
+            if index + 1 < len(self.stages):
+                for _ in range(self.stages[index + 1]["workers"]):
+                    await queues[index + 1].put(_END_OF_STREAM)
+
+        tasks = [asyncio.ensure_future(feed())]
+        tasks += [asyncio.ensure_future(run_stage(index)) for index in range(len(self.stages))]
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+
+        elapsed = time.perf_counter() - start_time
+        last_stage = stats[self.stages[-1]["name"]]
+        logger.info(f"Streamed {source_count} items through {len(self.stages)} stages in {elapsed:.2f}s, "
+                    f"first output after {last_stage['first_output'] or 0:.2f}s")
+        return {
+            "source_items": source_count,
+            "elapsed": elapsed,
+            "time_to_first_output": last_stage["first_output"],
+            "stages": stats,
+        }
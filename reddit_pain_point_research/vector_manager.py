@@ -2,12 +2,14 @@ from qdrant_client import QdrantClient
 from qdrant_client.http import models
 import os 
 from openai import OpenAI
-from typing import List
+from typing import List, Dict, Any, Iterator, Optional
 from json_schemas import PainPoint
+from dedup import EmbeddingDeduplicator
 import requests
 import ast
 import base64
 import numpy as np
+import threading
 import pickle
 import logging
 logging.basicConfig(
@@ -20,6 +22,9 @@ logger = logging.getLogger(__name__)
 from dotenv import load_dotenv
 load_dotenv()
 
+# Payload fields the summary and report read; fetching only these skips sources_post and project_id
+REPORT_PAYLOAD_FIELDS = ["content", "category"]
+
 class VectorDBManager:
     """Manages Qdrant vector database operations"""
 
@@ -36,6 +41,19 @@ class VectorDBManager:
         )
 
 
+        self.embedding_batch_size = int(os.getenv("EMBEDDING_BATCH_SIZE", 64))
+        self.duplicate_threshold = 0.8
+        self.deduplicator = EmbeddingDeduplicator(threshold=self.duplicate_threshold)
+        self.scroll_page_size = int(os.getenv("QDRANT_SCROLL_PAGE_SIZE", 256))
+
+        # Per-run snapshots of project payloads, dropped whenever store_vectors writes
+        self._pain_points_snapshots = {}
+        self._snapshots_lock = threading.Lock()
+
+        # Stored embedding matrix per project, scrolled once per run and extended on every upsert
+        self._project_vectors = {}
+        self._vectors_lock = threading.Lock()
+
         self.collection_name = "reddit_research" 
         self.create_collection(self.collection_name) 
 
@@ -53,18 +71,44 @@ class VectorDBManager:
             )
             logger.info(f"Collection {collection_name} created") 
 
+    def embed_texts(self, texts: List[str]) -> List[List[float]]:
+        """Embed texts with one embeddings request per batch"""
+        embeddings = []
+        for i in range(0, len(texts), self.embedding_batch_size):
+            batch = texts[i:i + self.embedding_batch_size]
+            response = self.embedding_chat_client.embeddings.create(
+                input=batch,
+                model=self.embedding_model
+            )
+            embeddings.extend(item.embedding for item in sorted(response.data, key=lambda item: item.index))
+        return embeddings
+
     def store_vectors(self, pain_points: List[PainPoint], project_id: str): 
         """Store pain points in Qdrant"""
-        for pain_point in pain_points:
-            text = pain_point.content
-            dense_embedding = self.embedding_chat_client.embeddings.create(
-                input=[text],
-                model=os.getenv("EMBEDDING_MODEL")
-            ).data[0].embedding
-
-            is_duplicate = self.check_duplicate(project_id, dense_embedding)
-            if not is_duplicate: 
-                point = models.PointStruct(
+        if not pain_points:
+            return
+
+        dense_embeddings = self.embed_texts([pain_point.content for pain_point in pain_points])
+
+        # Held until the cached matrix includes this batch, so concurrent writers dedup against each other
+        with self._vectors_lock:
+            self._store_deduplicated(pain_points, dense_embeddings, project_id)
+
+    def _store_deduplicated(self, pain_points: List[PainPoint], dense_embeddings: List[List[float]], project_id: str):
+        # One matrix multiply against the stored project vectors and within the batch
+        if project_id not in self._project_vectors:
+            self._project_vectors[project_id] = self.get_project_vectors(project_id)
+        existing_vectors = self._project_vectors[project_id]
+        keep = self.deduplicator.deduplicate(dense_embeddings, existing=existing_vectors)
+
+        points = []
+        for pain_point, dense_embedding, is_kept in zip(pain_points, dense_embeddings, keep):
+            if not is_kept:
+                logger.info(f"Pain point {pain_point.id} is a duplicate")
+                continue
+
+            points.append(
+                models.PointStruct(
                     id=pain_point.id,
                     vector=dense_embedding,
                     payload = {
@@ -74,64 +118,76 @@ class VectorDBManager:
                         "sources_post": pain_point.sources_post
                     }
                 )
-                self.client.upsert(
-                    collection_name=self.collection_name, 
-                    points=[point]
-                )
-                logger.info(f"Stored pain point {pain_point.id} in Qdrant") 
-            else:
-                logger.info(f"Pain point {pain_point.id} is a duplicate")
-
-    def check_duplicate(self, project_id, dense_embedding,) -> bool:
-        """Check if the pain point is a duplicate""" 
-        results = self.client.search(
-            collection_name=self.collection_name,
-            query_vector=dense_embedding,
-            score_threshold=0.8,
-            with_payload=True,
-            query_filter=models.Filter(
-                must=[
-                    models.FieldCondition( 
-                        key="project_id",
-                        match=models.MatchValue(value=project_id)
-                    )
-                ]
-            ),
-            limit=1
-        )
-        if results:
-            return True
-        else:
-            return False
-
-    def get_unique_pain_points(self, project_id: str) -> List[PainPoint]:
-        """Get unique pain points"""
-        count = self.client.count(
-            collection_name=self.collection_name,
-            count_filter=models.Filter(
-                must=[
-                    models.FieldCondition(key="project_id", match=models.MatchValue(value=project_id))
-                ]
             )
-        ).count
-        results = self.client.scroll(
-            collection_name=self.collection_name,
-            scroll_filter=models.Filter(
-                must=[
-                    models.FieldCondition(key="project_id", match=models.MatchValue(value=project_id))
-                ]
-            ),
-            with_payload=True,
-            with_vectors=False,
-            limit=count if count else 1 
-        )[0]
-
-        payloads = []
-        for result in results:
-            payload = result.payload 
-            payloads.append(payload)
 
-        return payloads
+        if points:
+            self.client.upsert(
+                collection_name=self.collection_name, 
+                points=points,
+                wait=True
+            )
+            kept_vectors = np.asarray([point.vector for point in points], dtype=np.float32)
+            self._project_vectors[project_id] = (
+                np.vstack([existing_vectors, kept_vectors]) if len(existing_vectors) else kept_vectors
+            )
+            self.invalidate_snapshot(project_id)
+        logger.info(f"Stored {len(points)} of {len(pain_points)} pain points in Qdrant") 
+
+    def _scroll_project(self, project_id, with_payload=True, with_vectors: bool = False, 
+                        page_size: int = None) -> Iterator[models.Record]:
+        """Page through the points of a project with next_page_offset"""
+        offset = None
+        while True:
+            records, offset = self.client.scroll(
+                collection_name=self.collection_name,
+                scroll_filter=models.Filter(
+                    must=[
+                        models.FieldCondition(key="project_id", match=models.MatchValue(value=project_id))
+                    ]
+                ),
+                with_payload=with_payload,
+                with_vectors=with_vectors,
+                limit=page_size or self.scroll_page_size,
+                offset=offset
+            )
+            yield from records
+            if offset is None:
+                break
+
+    def get_project_vectors(self, project_id, page_size: int = 1024) -> np.ndarray:
+        """Fetch the stored embedding matrix of a project"""
+        vectors = [
+            record.vector 
+            for record in self._scroll_project(project_id, with_payload=False, with_vectors=True, page_size=page_size)
+        ]
+        return np.asarray(vectors, dtype=np.float32)
+
+    def iter_pain_points(self, project_id, payload_fields: Optional[List[str]] = None, 
+                         page_size: int = None) -> Iterator[Dict[str, Any]]:
+        """Stream the payloads of a project page by page, optionally only the given fields"""
+        with_payload = payload_fields if payload_fields is not None else True
+        for record in self._scroll_project(project_id, with_payload=with_payload, page_size=page_size):
+            yield record.payload
+
+    def get_unique_pain_points(self, project_id, payload_fields: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        """Get unique pain points, memoized until the next write to the project"""
+        key = (project_id, tuple(payload_fields) if payload_fields is not None else None)
+        # Callers on worker threads wait for one scroll instead of racing to repeat it
+        with self._snapshots_lock:
+            if key not in self._pain_points_snapshots:
+                self._pain_points_snapshots[key] = list(self.iter_pain_points(project_id, payload_fields))
+            return self._pain_points_snapshots[key]
+
+    def reset_project_vectors(self, project_id):
+        """Drop the cached embedding matrix of a project, so the next store_vectors scrolls it again"""
+        with self._vectors_lock:
+            self._project_vectors.pop(project_id, None)
+
+    def invalidate_snapshot(self, project_id):
+        """Drop memoized payloads of a project"""
+        with self._snapshots_lock:
+            for key in [key for key in self._pain_points_snapshots if key[0] == project_id]:
+                del self._pain_points_snapshots[key]
         
 
         
@@ -0,0 +1,69 @@
+import time
+from functools import wraps
+from typing import Any, Dict, List
+
+import logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+    datefmt='%Y-%m-%d %H:%M:%S'
+)
+logger = logging.getLogger(__name__)
+
+
+class WorkflowTimer:
+    """Records when each graph node runs and derives the critical path of a run"""
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.run_start = time.perf_counter()
+        self.timings: Dict[str, Dict[str, float]] = {}
+
+    def wrap(self, node_name: str, func):
+        """Wrap an async node so its start and end times (seconds since the run started) are recorded"""
+        @wraps(func)
+        async def timed_node(state):
+            start = time.perf_counter() - self.run_start
+            try:
+                return await func(state)
+            finally:
+                end = time.perf_counter() - self.run_start
+                self.timings[node_name] = {"start": start, "end": end, "duration": end - start}
+        return timed_node
+
+    def critical_path(self, dependencies: Dict[str, List[str]]) -> List[str]:
+        """Walk back from the last node to finish, each time to the dependency that finished last"""
+        if not self.timings:
+            return []
+
+        node = max(self.timings, key=lambda name: self.timings[name]["end"])
+        path = [node]
+        while True:
+            finished = [dep for dep in dependencies.get(node, []) if dep in self.timings]
+            if not finished:
+                break
+            node = max(finished, key=lambda name: self.timings[name]["end"])
+            path.append(node)
+        return path[::-1]
+
+    def report(self, dependencies: Dict[str, List[str]]) -> Dict[str, Any]:
+        """Per-node timings, the critical path and how much the parallel branches saved"""
+        path = self.critical_path(dependencies)
+        wall_time = max((timing["end"] for timing in self.timings.values()), default=0.0)
+        node_time = sum(timing["duration"] for timing in self.timings.values())
+        report = {
+            "wall_time": wall_time,
+            "total_node_time": node_time,
+            "parallel_speedup": node_time / wall_time if wall_time else 1.0,
+            "critical_path": [{"node": node, "duration": self.timings[node]["duration"]} for node in path],
+            "critical_path_time": sum(self.timings[node]["duration"] for node in path),
+            "nodes": dict(sorted(self.timings.items(), key=lambda item: item[1]["start"])),
+        }
+
+        logger.info(f"Run took {wall_time:.1f}s wall time for {node_time:.1f}s of node time "
+                    f"({report['parallel_speedup']:.2f}x from parallel branches)")
+        logger.info("Critical path: " + " -> ".join(f"{step['node']} ({step['duration']:.1f}s)"
+                                                     for step in report["critical_path"]))
+        return report
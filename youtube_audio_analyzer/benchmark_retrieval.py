@@ -0,0 +1,159 @@
+"""Compare dense-only and hybrid (dense + BM25, RRF) retrieval on stored transcripts.
+
+Two query sets are scored separately. "spans" are verbatim spans of a stored
+segment that contain exact terms (numbers, product names), which favours BM25.
+"questions" are natural-language questions the LLM (LLM_BASE_URL, LLM_MODEL_NAME)
+writes about a segment in its own words, which favours dense retrieval. Either
+way the segment a query came from is the relevant result. Run with Qdrant up and
+at least one processed video:
+
+    python benchmark_retrieval.py --queries 200 --questions 50 --k 5
+"""
+import argparse
+import os
+import random
+import re
+import time
+
+import numpy as np
+from openai import OpenAI
+from qdrant_client import QdrantClient
+from qdrant_client.http import models
+from sentence_transformers import SentenceTransformer
+
+from retrieval import BM25_AVG_DOC_LEN, has_sparse_vectors, search_transcripts, tokenize
+
+EXACT_TERM_PATTERN = re.compile(r"\d|[A-Z][a-z]*[A-Z0-9]")
+
+QUESTION_PROMPT = """Here is a passage from a video transcript:
+
+{transcript}
+
+Write one question a viewer could ask that this passage answers. Use your own words
+and do not copy phrases from the passage. Reply with the question only."""
+
+
+def load_segments(client: QdrantClient, collection_name: str) -> list:
+    segments, offset = [], None
+    while True:
+        points, offset = client.scroll(
+            collection_name=collection_name,
+            limit=256,
+            offset=offset,
+            with_payload=["transcript", "video_title"],
+            with_vectors=False,
+        )
+        segments.extend(points)
+        if offset is None:
+            return segments
+
+
+def build_queries(segments: list, num_queries: int, span_words: int, seed: int) -> list:
+    """(question, video_title, relevant point id) triples, preferring spans with exact terms"""
+    rng = random.Random(seed)
+    candidates = []
+    for point in segments:
+        words = point.payload["transcript"].split()
+        for start in range(0, max(len(words) - span_words, 0), span_words):
+            span = words[start:start + span_words]
+            if any(EXACT_TERM_PATTERN.search(word) for word in span):
+                candidates.append((" ".join(span), point.payload["video_title"], point.id))
+    rng.shuffle(candidates)
+    return candidates[:num_queries]
+
+
+def build_question_queries(segments: list, num_queries: int, seed: int, llm: OpenAI, model: str) -> list:
+    """(question, video_title, relevant point id) triples with LLM-written paraphrased questions"""
+    rng = random.Random(seed)
+    sampled = rng.sample(segments, min(num_queries, len(segments)))
+    queries = []
+    for point in sampled:
+        response = llm.chat.completions.create(
+            model=model,
+            messages=[{"role": "user", "content": QUESTION_PROMPT.format(transcript=point.payload["transcript"])}],
+            temperature=0.7,
+            max_tokens=128,
+            extra_body={"chat_template_kwargs": {"enable_thinking": False}},
+        )
+        question = (response.choices[0].message.content or "").strip()
+        if question:
+            queries.append((question, point.payload["video_title"], point.id))
+    return queries
+
+
+def run(client: QdrantClient, collection_name: str, embeddings: list, queries: list, k: int, hybrid: bool) -> dict:
+    hits, latencies = 0, []
+    for embedding, (question, video_title, relevant_id) in zip(embeddings, queries):
+        start_time = time.perf_counter()
+        results = search_transcripts(
+            client,
+            collection_name,
+            embedding,
+            question,
+            query_filter=models.Filter(
+                must=[models.FieldCondition(key="video_title", match=models.MatchValue(value=video_title))]
+            ),
+            limit=k,
+            hybrid=hybrid,
+        )
+        latencies.append((time.perf_counter() - start_time) * 1000)
+        hits += any(result.id == relevant_id for result in results)
+    return {
+        "recall": hits / len(queries),
+        "p50_ms": float(np.percentile(latencies, 50)),
+        "p95_ms": float(np.percentile(latencies, 95)),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--collection", default="yt_transcripts")
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--port", type=int, default=6333)
+    parser.add_argument("--query-style", choices=("spans", "questions", "both"), default="both")
+    parser.add_argument("--queries", type=int, default=200, help="number of verbatim span queries")
+    parser.add_argument("--questions", type=int, default=50, help="number of LLM-written questions")
+    parser.add_argument("--span-words", type=int, default=6)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    client = QdrantClient(host=args.host, port=args.port)
+    if not has_sparse_vectors(client, args.collection):
+        raise SystemExit(f"{args.collection} has no sparse vectors; re-create it and re-process videos first")
+
+    segments = load_segments(client, args.collection)
+    if not segments:
+        raise SystemExit(f"No transcript segments found in {args.collection}")
+    avg_tokens = np.mean([len(tokenize(point.payload["transcript"])) for point in segments])
+    print(f"{len(segments)} segments, {avg_tokens:.0f} tokens on average (BM25_AVG_DOC_LEN={BM25_AVG_DOC_LEN}, "
+          f"override with YT_BM25_AVG_DOC_LEN)")
+
+    query_sets = {}
+    if args.query_style in ("spans", "both"):
+        query_sets["spans"] = build_queries(segments, args.queries, args.span_words, args.seed)
+    if args.query_style in ("questions", "both"):
+        llm = OpenAI(base_url=os.getenv("LLM_BASE_URL", "http://192.168.0.153:7001/v1"),
+                     api_key=os.getenv("LLM_API_KEY", "token-abc123"))
+        model = os.getenv("LLM_MODEL_NAME", "unsloth/Qwen3-8B-unsloth-bnb-4bit")
+        query_sets["questions"] = build_question_queries(segments, args.questions, args.seed, llm, model)
+
+    embedder = SentenceTransformer("jinaai/jina-embeddings-v3", trust_remote_code=True)
+    for style, queries in query_sets.items():
+        if not queries:
+            print(f"\n{style}: no queries")
+            continue
+        embeddings = embedder.encode(
+            sentences=[question for question, _, _ in queries],
+            task="retrieval.query",
+        ).tolist()
+
+        print(f"\n{style}: {len(queries)} queries, k={args.k}")
+        for name, hybrid in (("dense", False), ("hybrid", True)):
+            stats = run(client, args.collection, embeddings, queries, args.k, hybrid)
+            print(f"{name:>6}: recall@{args.k} {stats['recall']:.3f}  "
+                  f"p50 {stats['p50_ms']:.1f} ms  p95 {stats['p95_ms']:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
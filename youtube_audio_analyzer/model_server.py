@@ -0,0 +1,111 @@
+"""Long-lived ASR and embedding worker, so Streamlit restarts don't reload model weights.
+
+Start it once, then point the app at it with YT_MODEL_SERVER and the same
+YT_MODEL_SERVER_AUTHKEY (the server generates and prints a key when it is unset):
+
+    YT_MODEL_SERVER_AUTHKEY=<secret> python model_server.py --host 127.0.0.1 --port 6100
+    YT_MODEL_SERVER_AUTHKEY=<secret> YT_MODEL_SERVER=127.0.0.1:6100 streamlit run yt_audio.py
+"""
+import argparse
+import os
+import secrets
+import threading
+from multiprocessing.managers import BaseManager
+from types import SimpleNamespace
+
+ASR_MODEL_NAME = "nvidia/parakeet-tdt-0.6b-v2"
+EMBEDDING_MODEL_NAME = "jinaai/jina-embeddings-v3"
+MODEL_SERVER_AUTHKEY_ENV = "YT_MODEL_SERVER_AUTHKEY"
+
+
+def load_transcriber():
+    import nemo.collections.asr as nemo_asr
+    return nemo_asr.models.ASRModel.from_pretrained(model_name=ASR_MODEL_NAME)
+
+
+def load_embedder():
+    from sentence_transformers import SentenceTransformer
+    return SentenceTransformer(EMBEDDING_MODEL_NAME, trust_remote_code=True)
+
+
+class ModelWorker:
+    """Transcribe and encode with models loaded once in this process, each on its first use"""
+
+    def __init__(self):
+        self._locks = {"transcriber": threading.Lock(), "embedder": threading.Lock()}
+        self._loaders = {"transcriber": load_transcriber, "embedder": load_embedder}
+        self._models = {}
+
+    def _model(self, name: str):
+        # One lock per model, so encode calls don't wait for the ASR model to load
+        with self._locks[name]:
+            if name not in self._models:
+                self._models[name] = self._loaders[name]()
+        return self._models[name]
+
+    def transcribe(self, audio, batch_size: int = 1, timestamps: bool = True):
+        """Same call as ASRModel.transcribe; returns picklable text/word-timestamp records"""
+        transcriber = self._model("transcriber")
+        outputs = transcriber.transcribe(audio, batch_size=batch_size, timestamps=timestamps)
+        return [
+            SimpleNamespace(
+                text=output.text,
+                timestamp={"word": [
+                    {"word": word["word"], "start": word["start"], "end": word["end"]}
+                    for word in (getattr(output, "timestamp", None) or {}).get("word", [])
+                ]}
+            )
+            for output in outputs
+        ]
+
+    def encode(self, sentences, task: str = None, batch_size: int = 32):
+        embedder = self._model("embedder")
+        return embedder.encode(sentences=sentences, task=task, batch_size=batch_size)
+
+
+class ModelServerManager(BaseManager):
+    pass
+
+
+def parse_address(address: str):
+    host, port = address.rsplit(":", 1)
+    return host, int(port)
+
+
+def connect_model_server(address: str):
+    """Proxy to a running ModelWorker; each calling thread gets its own connection"""
+    authkey = os.getenv(MODEL_SERVER_AUTHKEY_ENV)
+    if not authkey:
+        raise RuntimeError(f"{MODEL_SERVER_AUTHKEY_ENV} must be set to the model server's authkey")
+    ModelServerManager.register("worker")
+    manager = ModelServerManager(address=parse_address(address), authkey=authkey.encode("utf-8"))
+    manager.connect()
+    return manager.worker()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=6100)
+    args = parser.parse_args()
+
+    authkey = os.getenv(MODEL_SERVER_AUTHKEY_ENV)
+    if not authkey:
+        authkey = secrets.token_hex(16)
+        print(f"{MODEL_SERVER_AUTHKEY_ENV} not set, generated one for this server; start the app with:")
+        print(f"    {MODEL_SERVER_AUTHKEY_ENV}={authkey} YT_MODEL_SERVER={args.host}:{args.port} streamlit run yt_audio.py")
+
+    # Each model loads in its own thread while the server already accepts calls;
+    # a call waits only for the model it needs
+    worker = ModelWorker()
+    for name in ("embedder", "transcriber"):
+        threading.Thread(target=worker._model, args=(name,), name=f"load-{name}", daemon=True).start()
+    ModelServerManager.register("worker", callable=lambda: worker)
+    manager = ModelServerManager(address=(args.host, args.port), authkey=authkey.encode("utf-8"))
+    server = manager.get_server()
+    print(f"Model server listening on {args.host}:{args.port}")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+import os
+import re
+import zlib
+from collections import Counter
+
+from qdrant_client import QdrantClient
+from qdrant_client.http import models
+
+SPARSE_VECTOR_NAME = "bm25"
+DENSE_VECTOR_NAME = ""  # key of the collection's unnamed default vector in point vectors
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+# Average segment length in tokens for BM25 length normalization. A stitched segment
+# covers one chunk step of chunk_audio (120 s window - 20 s overlap = 100 s), and
+# conversational English runs at ~160 words per minute, i.e. ~270 tokens per segment.
+# benchmark_retrieval.py prints the measured average of the stored segments to tune it.
+SEGMENT_SECONDS = 100
+SPEECH_WORDS_PER_MINUTE = 160
+BM25_AVG_DOC_LEN = int(os.getenv("YT_BM25_AVG_DOC_LEN", round(SEGMENT_SECONDS / 60 * SPEECH_WORDS_PER_MINUTE)))
+
+TOKEN_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+
+def tokenize(text: str) -> list:
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+def token_index(token: str) -> int:
+    # Stable across processes, unlike hash()
+    return zlib.crc32(token.encode("utf-8"))
+
+
+def bm25_document_vector(text: str) -> models.SparseVector:
+    """BM25 term-frequency weights of a passage; Qdrant applies IDF through the collection modifier"""
+    counts = Counter(tokenize(text))
+    doc_len = sum(counts.values())
+    indices, values = [], []
+    for token, tf in counts.items():
+        indices.append(token_index(token))
+        values.append(tf * (BM25_K1 + 1) / (tf + BM25_K1 * (1 - BM25_B + BM25_B * doc_len / BM25_AVG_DOC_LEN)))
+    return models.SparseVector(indices=indices, values=values)
+
+
+def bm25_query_vector(text: str) -> models.SparseVector:
+    tokens = sorted(set(tokenize(text)))
+    return models.SparseVector(indices=[token_index(token) for token in tokens], values=[1.0] * len(tokens))
+
+
+def sparse_vectors_config() -> dict:
+    return {SPARSE_VECTOR_NAME: models.SparseVectorParams(modifier=models.Modifier.IDF)}
+
+
+def has_sparse_vectors(client: QdrantClient, collection_name: str) -> bool:
+    """Collections created before hybrid search have no sparse vector to query"""
+    sparse_config = client.get_collection(collection_name).config.params.sparse_vectors or {}
+    return SPARSE_VECTOR_NAME in sparse_config
+
+
+def search_transcripts(client: QdrantClient, collection_name: str, dense_embedding: list, question: str,
+                       query_filter: models.Filter = None, limit: int = 5, score_threshold: float = 0.2,
+                       hybrid: bool = True):
+    """Dense-only search, or dense + BM25 candidates fused with reciprocal rank fusion"""
+    if not hybrid:
+        return client.query_points(
+            collection_name=collection_name,
+            query=dense_embedding,
+            with_payload=True,
+            with_vectors=False,
+            score_threshold=score_threshold,
+            query_filter=query_filter,
+            limit=limit
+        ).points
+
+    prefetch_limit = limit * 4
+    return client.query_points(
+        collection_name=collection_name,
+        prefetch=[
+            models.Prefetch(
+                query=dense_embedding,
+                using=None,
+                filter=query_filter,
+                score_threshold=score_threshold,
+                limit=prefetch_limit
+            ),
+            models.Prefetch(
+                query=bm25_query_vector(question),
+                using=SPARSE_VECTOR_NAME,
+                filter=query_filter,
+                limit=prefetch_limit
+            ),
+        ],
+        query=models.FusionQuery(fusion=models.Fusion.RRF),
+        with_payload=True,
+        with_vectors=False,
+        limit=limit
+    ).points
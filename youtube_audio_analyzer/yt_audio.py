@@ -6,31 +6,111 @@ import time
 from pytubefix import YouTube
 from pytubefix.cli import on_progress
 import re
-import librosa
-import soundfile as sf
-import nemo.collections.asr as nemo_asr
-import glob
+import subprocess
+import threading
+import queue
+from difflib import SequenceMatcher
 from tqdm import tqdm
-from uuid import uuid4 
+from uuid import uuid5, NAMESPACE_URL
+import sqlite3
+import hashlib
+from urllib.parse import urlparse, parse_qs
 from qdrant_client import QdrantClient
 from qdrant_client.http import models
 from qdrant_client.http.models import PointStruct
 import numpy as np
-from sentence_transformers import SentenceTransformer
+from collections import OrderedDict
+from itertools import islice
+from retrieval import (
+    DENSE_VECTOR_NAME,
+    SPARSE_VECTOR_NAME,
+    bm25_document_vector,
+    has_sparse_vectors,
+    search_transcripts,
+    sparse_vectors_config
+)
+from model_server import connect_model_server, load_embedder, load_transcriber
+
+MODEL_SERVER = os.getenv("YT_MODEL_SERVER")  # host:port of model_server.py, models load in-process when unset
+MODEL_WARMUP = os.getenv("YT_MODEL_WARMUP", "1") == "1"
+
+class LazyModel:
+    """Model loaded on first use, optionally warmed up ahead of time in a background thread"""
+
+    def __init__(self, name: str, loader):
+        self.name = name
+        self.loader = loader
+        self.model = None
+        self.status = "not loaded"
+        self.error = None
+        self.lock = threading.Lock()
+
+    def get(self):
+        if self.model is not None:
+            return self.model
+        with self.lock:
+            if self.model is None:
+                self.status = "loading"
+                start_time = time.perf_counter()
+                try:
+                    self.model = self.loader()
+                except Exception as e:
+                    self.status = "failed"
+                    self.error = str(e)
+                    raise
+                self.status = "ready"
+                print(f"{self.name} loaded in {time.perf_counter() - start_time:.1f}s")
+        return self.model
+
+    @property
+    def ready(self) -> bool:
+        return self.model is not None
+
+    def warm_up(self):
+        try:
+            self.get()
+        except Exception as e:
+            print(f"Warm-up of {self.name} failed: {e}")
 
 @st.cache_resource()
-def load_model():
-    transcriber = nemo_asr.models.ASRModel.from_pretrained(model_name="nvidia/parakeet-tdt-0.6b-v2")
-    return transcriber
+def load_models() -> dict:
+    # Cached per process, so reruns and sessions share the same models
+    if MODEL_SERVER:
+        loaders = {"embedder": lambda: connect_model_server(MODEL_SERVER),
+                   "transcriber": lambda: connect_model_server(MODEL_SERVER)}
+    else:
+        loaders = {"embedder": load_embedder, "transcriber": load_transcriber}
+    lazy_models = {
+        "embedder": LazyModel("Embedding model", loaders["embedder"]),
+        "transcriber": LazyModel("ASR model", loaders["transcriber"]),
+    }
+    if MODEL_WARMUP:
+        # Embedder first: chatting over a stored transcript only needs it
+        def warm_up_all():
+            lazy_models["embedder"].warm_up()
+            lazy_models["transcriber"].warm_up()
+        threading.Thread(target=warm_up_all, name="model-warm-up", daemon=True).start()
+    return lazy_models
 
-@st.cache_resource() 
-def load_embedder(): 
-    embedder = SentenceTransformer("jinaai/jina-embeddings-v3", trust_remote_code=True)
-    return embedder
+RETRIEVAL_MODE = os.getenv("YT_RETRIEVAL_MODE", "hybrid")  # "hybrid" or "dense"
 
-# Initialize cached models
-transcriber = load_model()
-embedder = load_embedder()
+LLM_BASE_URL = os.getenv("LLM_BASE_URL", "http://192.168.0.153:7001/v1")
+LLM_API_KEY = os.getenv("LLM_API_KEY", "token-abc123")
+LLM_MODEL_NAME = os.getenv("LLM_MODEL_NAME", "unsloth/Qwen3-8B-unsloth-bnb-4bit")
+
+@st.cache_resource()
+def load_llm_client():
+    # One client (and HTTP connection pool) shared by every question and rerun
+    return OpenAI(base_url=LLM_BASE_URL, api_key=LLM_API_KEY)
+
+# Models load in the background; the first call that needs one waits for it
+lazy_models = load_models()
+
+def get_embedder():
+    return lazy_models["embedder"].get()
+
+def get_transcriber():
+    return lazy_models["transcriber"].get()
 
 qdrant_client = QdrantClient(host="localhost", port=6333)
 # Configure Streamlit page
@@ -53,6 +133,8 @@ if 'current_step' not in st.session_state:
     st.session_state.current_step = "" 
 if "video_title" not in st.session_state:
     st.session_state.video_title = ""
+if "chat_metrics" not in st.session_state:
+    st.session_state.chat_metrics = None
     
 
 
@@ -65,6 +147,7 @@ def create_collection(collection_name: str):
                 size=1024,
                 distance=models.Distance.COSINE
                 ),
+            sparse_vectors_config=sparse_vectors_config(),
             hnsw_config=models.HnswConfigDiff(
                 m=64,
                 ef_construct=200
@@ -74,86 +157,546 @@ def create_collection(collection_name: str):
     else:
         print(f"Collection {collection_name} already exists")
 
-def store_transcript(collection_name: str, transcript: str, video_title: str, index: int): 
-    dense_embedding = embedder.encode(
-        sentences=[transcript],
-        task="retrieval.query",
-    ).tolist()[0]
+@st.cache_resource()
+def load_hybrid_collections() -> set:
+    return set()
+
+def collection_supports_hybrid(collection_name: str) -> bool:
+    # Only positive results are cached: a collection created or recreated later is picked up at once
+    hybrid_collections = load_hybrid_collections()
+    if collection_name in hybrid_collections:
+        return True
+    if qdrant_client.collection_exists(collection_name) and has_sparse_vectors(qdrant_client, collection_name):
+        hybrid_collections.add(collection_name)
+        return True
+    return False
+
+def segment_point_id(video_id: str, fingerprint: str, index: int) -> str:
+    """Deterministic point id, so ingesting the same audio twice overwrites instead of duplicating"""
+    return str(uuid5(NAMESPACE_URL, f"yt://{video_id}/{fingerprint}/{index}"))
+
+def store_transcripts(collection_name: str, segments: list, video_title: str, video_id: str, fingerprint: str, 
+                      batch_size: int = 32, start_index: int = 0) -> float: 
+    """Embed all transcript segments as passages and write them with one upsert, returns points/sec"""
+    if not segments:
+        return 0.0
+
+    start_time = time.perf_counter()
+    hybrid = collection_supports_hybrid(collection_name)
+    dense_embeddings = get_embedder().encode(
+        sentences=[segment["text"] for segment in segments],
+        task="retrieval.passage",
+        batch_size=batch_size,
+    ).tolist()
     
     points = [
         models.PointStruct(
-            id = str(uuid4()),
-            vector = dense_embedding,
+            id = segment_point_id(video_id, fingerprint, index),
+            vector = {
+                DENSE_VECTOR_NAME: dense_embedding,
+                SPARSE_VECTOR_NAME: bm25_document_vector(segment["text"])
+            } if hybrid else dense_embedding,
             payload = {
-                "transcript": transcript,
+                "transcript": segment["text"],
                 "index": index,
-                "video_title": video_title
+                "video_title": video_title,
+                "video_id": video_id,
+                "start": segment["start"],
+                "end": segment["end"]
             }
         )
+        for index, (segment, dense_embedding) in enumerate(zip(segments, dense_embeddings), start=start_index)
     ]
     
     res = qdrant_client.upsert(
         collection_name=collection_name,
-        points=points
+        points=points,
+        wait=True
     )
+    points_per_sec = len(points) / (time.perf_counter() - start_time)
     
     if res.status.value == 'completed':
-        print(f"Transcript {index} stored successfully in collection {collection_name}")
+        print(f"{len(points)} transcripts stored successfully in collection {collection_name} ({points_per_sec:.1f} points/sec)")
     else:
-        print(f"Failed to store transcript {index} in collection {collection_name}")
+        print(f"Failed to store transcripts in collection {collection_name}")
+    return points_per_sec
         
-def chunk_audio(temp_dir, audio_file_path: str, chunk_duration: int = 120, overlap_duration: int = 20):
-    chunks_dir = os.path.join(temp_dir, "audio_chunks")
-    audio_file_name = os.path.basename(audio_file_path).split(".")[0] 
-    os.makedirs(chunks_dir, exist_ok=True)
-    
-    audio, sr = librosa.load(audio_file_path, sr=None, mono=True)
-    samples_per_chunk = int(chunk_duration * sr)
-    overlap_samples = int(overlap_duration * sr)
+class VideoRegistry:
+    """SQLite registry of ingested videos keyed by video id and audio-stream fingerprint"""
+
+    def __init__(self, db_path: str):
+        db_dir = os.path.dirname(db_path)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.execute(
+            """CREATE TABLE IF NOT EXISTS videos (
+                video_id TEXT PRIMARY KEY,
+                fingerprint TEXT NOT NULL,
+                video_title TEXT NOT NULL,
+                num_segments INTEGER NOT NULL,
+                ingested_at REAL NOT NULL
+            )"""
+        )
+        self.conn.commit()
+        self.lock = threading.Lock()
+
+    def get(self, video_id: str):
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT fingerprint, video_title, num_segments FROM videos WHERE video_id = ?", (video_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        return {"fingerprint": row[0], "video_title": row[1], "num_segments": row[2]}
+
+    def register(self, video_id: str, fingerprint: str, video_title: str, num_segments: int):
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO videos (video_id, fingerprint, video_title, num_segments, ingested_at) VALUES (?, ?, ?, ?, ?)",
+                (video_id, fingerprint, video_title, num_segments, time.time())
+            )
+            self.conn.commit()
+
+@st.cache_resource()
+def load_video_registry():
+    return VideoRegistry(os.getenv("YT_REGISTRY_PATH", "yt_video_registry.sqlite"))
+
+def audio_stream_fingerprint(stream) -> str:
+    """Identify the audio stream without downloading it: itag, byte size and last-modified time"""
+    query = parse_qs(urlparse(stream.url).query)
+    parts = [str(stream.itag), str(stream.filesize), query.get("lmt", [""])[0], query.get("clen", [""])[0]]
+    return hashlib.sha256(":".join(parts).encode()).hexdigest()[:16]
+
+def count_video_points(collection_name: str, video_id: str) -> int:
+    return qdrant_client.count(
+        collection_name=collection_name,
+        count_filter=models.Filter(
+            must=[models.FieldCondition(key="video_id", match=models.MatchValue(value=video_id))]
+        ),
+        exact=True
+    ).count
+
+def delete_video_points(collection_name: str, video_id: str):
+    qdrant_client.delete(
+        collection_name=collection_name,
+        points_selector=models.FilterSelector(
+            filter=models.Filter(
+                must=[models.FieldCondition(key="video_id", match=models.MatchValue(value=video_id))]
+            )
+        ),
+        wait=True
+    )
+
+def load_transcript_segments(collection_name: str, video_id: str) -> list:
+    """Rebuild the stitched segments of an ingested video from its stored points"""
+    segments = []
+    offset = None
+    while True:
+        records, offset = qdrant_client.scroll(
+            collection_name=collection_name,
+            scroll_filter=models.Filter(
+                must=[models.FieldCondition(key="video_id", match=models.MatchValue(value=video_id))]
+            ),
+            with_payload=True,
+            with_vectors=False,
+            limit=256,
+            offset=offset
+        )
+        for record in records:
+            segments.append({
+                "index": record.payload["index"],
+                "start": record.payload["start"],
+                "end": record.payload["end"],
+                "text": record.payload["transcript"]
+            })
+        if offset is None:
+            break
+    return sorted(segments, key=lambda segment: segment["index"])
+
+def format_transcript(segments: list) -> str:
+    return "\n".join(
+        f"[{format_timestamp(segment['start'])} - {format_timestamp(segment['end'])}] {segment['text']}" for segment in segments
+    )
+
+ASR_SAMPLE_RATE = 16000
+ASR_MEMORY_FACTOR = 200
+
+def chunk_audio(audio_file_path: str, chunk_duration: int = 120, overlap_duration: int = 20, 
+                sample_rate: int = ASR_SAMPLE_RATE, block_duration: int = 10):
+    """Stream overlapping mono windows of the audio file at the ASR sample rate.
+
+    ffmpeg decodes and resamples the file once and pipes float32 PCM in blocks, so
+    memory stays bounded by one window however long the video is. Yields
+    (start_seconds, samples) tuples. Raises RuntimeError with ffmpeg's stderr when
+    decoding fails, e.g. when a streamed URL drops mid-video.
+    """
+    samples_per_chunk = int(chunk_duration * sample_rate)
+    overlap_samples = int(overlap_duration * sample_rate)
     step_size = samples_per_chunk - overlap_samples
-    
-    total_chunks = max(1, (len(audio) - overlap_samples) // step_size + 
-                      (1 if (len(audio) - overlap_samples) % step_size else 0))
-    
-    print(f"Total chunks: {total_chunks}") 
-    
-    for i in range(total_chunks):
-        start_idx = i * step_size
-        end_idx = min(start_idx + samples_per_chunk, len(audio))
-        if end_idx - start_idx < samples_per_chunk * 0.2: 
-            break 
-        
-        chunk = audio[start_idx:end_idx]
-        output_file = os.path.join(chunks_dir, f"{audio_file_name}_chunk_{i+1:03d}.wav")
-        sf.write(output_file, chunk, sr)
-        print(f"Chunk {i+1} saved to {output_file}") 
-    
-    return chunks_dir
+    block_bytes = int(block_duration * sample_rate) * 4
+
+    # stderr goes to a file so it cannot fill a pipe and stall ffmpeg while we read stdout
+    stderr_file = tempfile.TemporaryFile()
+    process = subprocess.Popen(
+        ["ffmpeg", "-nostdin", "-loglevel", "error", "-i", audio_file_path,
+         "-f", "f32le", "-ac", "1", "-ar", str(sample_rate), "-"],
+        stdout=subprocess.PIPE,
+        stderr=stderr_file
+    )
+
+    buffer = np.zeros(0, dtype=np.float32)
+    buffer_start = 0
+    chunk_index = 0
+    try:
+        while True:
+            data = process.stdout.read(block_bytes)
+            if data:
+                buffer = np.concatenate([buffer, np.frombuffer(data[:len(data) - len(data) % 4], dtype=np.float32)])
+
+            while len(buffer) >= samples_per_chunk:
+                yield buffer_start / sample_rate, buffer[:samples_per_chunk].copy()
+                print(f"Chunk {chunk_index+1} decoded")
+                chunk_index += 1
+                buffer = buffer[step_size:]
+                buffer_start += step_size
+
+            if not data:
+                break
+
+        if process.wait() != 0:
+            stderr_file.seek(0)
+            error = stderr_file.read().decode("utf-8", errors="replace").strip()
+            raise RuntimeError(f"ffmpeg failed with exit code {process.returncode} while decoding audio: {error}")
+
+        # Tail: skip it when it adds less than 20% of a chunk beyond the previous window
+        if chunk_index == 0 and len(buffer) > 0:
+            yield buffer_start / sample_rate, buffer.copy()
+        elif len(buffer) > overlap_samples and len(buffer) >= samples_per_chunk * 0.2:
+            yield buffer_start / sample_rate, buffer.copy()
+    finally:
+        # The consumer closed the generator early: stop ffmpeg instead of raising
+        if process.poll() is None:
+            process.kill()
+        process.stdout.close()
+        process.wait()
+        stderr_file.close()
+
+def available_memory_bytes() -> int:
+    """Free memory on the transcription device (GPU if present, else system RAM)"""
+    import torch  # deferred: importing torch adds seconds to every cold start
+    if torch.cuda.is_available():
+        return torch.cuda.mem_get_info()[0]
+    try:
+        return os.sysconf("SC_AVPHYS_PAGES") * os.sysconf("SC_PAGE_SIZE")
+    except (ValueError, OSError, AttributeError):
+        return 4 * 1024 ** 3
+
+def auto_batch_size(chunk_duration: int = 120, sample_rate: int = ASR_SAMPLE_RATE, max_batch_size: int = 16) -> int:
+    """Pick how many windows to transcribe per call from the memory that is free.
+
+    A window needs roughly ASR_MEMORY_FACTOR times its raw float32 size for encoder
+    activations; only half of the free memory is budgeted to leave headroom.
+    """
+    if os.getenv("ASR_BATCH_SIZE"):
+        return max(1, int(os.getenv("ASR_BATCH_SIZE")))
+    bytes_per_chunk = chunk_duration * sample_rate * 4 * ASR_MEMORY_FACTOR
+    return int(max(1, min(max_batch_size, (available_memory_bytes() // 2) // bytes_per_chunk)))
+
+def transcribe_audio(audio_chunks, batch_size: int = None):
+    """Transcribe (start_seconds, audio) windows, feeding batch_size windows per model call.
+
+    audio may be an in-memory float32 array at 16 kHz or a path to an audio file.
+    """
+    if batch_size is None:
+        batch_size = auto_batch_size()
+    print(f"Transcribing with batch size {batch_size}")
 
-def transcribe_audio(chunks_dir: str):
     all_transcripts = []
-    wav_files = sorted(glob.glob(os.path.join(chunks_dir, "*.wav")))        
-    for i, wav_file in enumerate(wav_files):
-        output = transcriber.transcribe([wav_file])[0].text
-        all_transcripts.append(output)
+    audio_chunks = iter(audio_chunks)
+    while True:
+        batch = list(islice(audio_chunks, batch_size))
+        if not batch:
+            break
+        outputs = get_transcriber().transcribe([audio for start_time, audio in batch], batch_size=len(batch), timestamps=True)
+        for (start_time, audio), output in zip(batch, outputs):
+            all_transcripts.append(chunk_transcript(start_time, audio, output))
     
     return all_transcripts
+
+def chunk_transcript(start_time: float, audio, output) -> dict:
+    """Chunk transcript with word timestamps shifted to absolute video time"""
+    if isinstance(audio, np.ndarray):
+        duration = len(audio) / ASR_SAMPLE_RATE
+    else:
+        import librosa  # deferred: only needed for file inputs, slow to import
+        duration = librosa.get_duration(path=audio)
+
+    words = []
+    timestamps = getattr(output, "timestamp", None) or {}
+    for word in timestamps.get("word", []):
+        words.append({
+            "word": word["word"],
+            "start": start_time + word["start"],
+            "end": start_time + word["end"]
+        })
+
+    return {
+        "start": start_time,
+        "end": start_time + duration,
+        "text": output.text,
+        "words": words
+    }
+
+def overlap_token_cut(previous_tokens, next_tokens, previous_overlap: float = 1.0, next_overlap: float = 1.0,
+                      min_match: int = 3, margin: float = 1.5):
+    """Align the tail of one chunk with the head of the next on their longest common token run.
+
+    previous_overlap and next_overlap are the shares of each chunk's duration that
+    overlap; only that tail and head (widened by margin) are searched, so a phrase
+    repeated elsewhere in the audio cannot match. Returns how many tokens to keep
+    from the previous chunk and how many to skip from the next one, or None when no
+    reliable run is found.
+    """
+    matcher = SequenceMatcher(
+        None,
+        [token.lower().strip(".,!?;:") for token in previous_tokens],
+        [token.lower().strip(".,!?;:") for token in next_tokens],
+        autojunk=False
+    )
+    previous_window = min(len(previous_tokens), int(np.ceil(len(previous_tokens) * previous_overlap * margin)))
+    next_window = min(len(next_tokens), int(np.ceil(len(next_tokens) * next_overlap * margin)))
+    match = matcher.find_longest_match(len(previous_tokens) - previous_window, len(previous_tokens), 0, next_window)
+    if match.size < min_match:
+        return None
+    return match.a, match.b
+
+def stitch_transcript_stream(chunk_transcripts):
+    """Drop the speech repeated in overlapping windows and yield timed segments.
+
+    With word timestamps every overlap is cut at its midpoint: words starting before
+    it belong to the earlier chunk, the rest to the later one. Without timestamps
+    the chunks are aligned on their longest common token run instead. A segment is
+    yielded as soon as the following chunk arrives, so this can consume a stream.
+    """
+    def make_segment(chunk):
+        if chunk["words"]:
+            text = " ".join(word["word"] for word in chunk["words"])
+            return {"start": chunk["words"][0]["start"], "end": chunk["words"][-1]["end"], "text": text}
+        text = " ".join(chunk["tokens"])
+        return {"start": chunk["start"], "end": chunk["end"], "text": text}
+
+    previous = None
+    for chunk_output in chunk_transcripts:
+        current = {
+            "start": chunk_output["start"],
+            "end": chunk_output["end"],
+            "words": list(chunk_output["words"]),
+            "tokens": chunk_output["text"].split() if not chunk_output["words"] else [word["word"] for word in chunk_output["words"]],
+        }
+
+        if previous is not None:
+            overlap = max(min(previous["end"], current["end"]) - current["start"], 0.0)
+            previous_overlap = overlap / max(previous["end"] - previous["start"], 1e-6)
+            next_overlap = overlap / max(current["end"] - current["start"], 1e-6)
+            cut = (current["start"] + min(previous["end"], current["end"])) / 2
+            previous["end"] = cut
+            current["start"] = cut
+
+            if previous["words"] and current["words"]:
+                previous["words"] = [word for word in previous["words"] if word["start"] < cut]
+                current["words"] = [word for word in current["words"] if word["start"] >= cut]
+                current["tokens"] = [word["word"] for word in current["words"]]
+            else:
+                token_cut = overlap_token_cut(previous["tokens"], current["tokens"], previous_overlap, next_overlap)
+                if token_cut is not None:
+                    keep_previous, skip_next = token_cut
+                    previous["tokens"] = previous["tokens"][:keep_previous]
+                    current["tokens"] = current["tokens"][skip_next:]
+                previous["words"] = current["words"] = []
+
+            segment = make_segment(previous)
+            if segment["text"]:
+                yield segment
+        previous = current
+
+    if previous is not None:
+        segment = make_segment(previous)
+        if segment["text"]:
+            yield segment
+
+def stitch_transcripts(chunk_transcripts):
+    return list(stitch_transcript_stream(chunk_transcripts))
+
+def format_timestamp(seconds: float) -> str:
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours:d}:{minutes:02d}:{seconds:02d}" if hours else f"{minutes:d}:{seconds:02d}"
     
-def get_sources(question: str, video_title: str):
-    dense_embedding = embedder.encode(
+PIPELINE_QUEUE_SIZE = 4
+STORE_BATCH_SIZE = int(os.getenv("YT_STORE_BATCH_SIZE", 2))  # stitched segments embedded and upserted together
+STORE_FLUSH_SECONDS = float(os.getenv("YT_STORE_FLUSH_SECONDS", 30))  # upsert a partial batch after this long
+STREAM_AUDIO_FROM_URL = os.getenv("YT_STREAM_AUDIO_FROM_URL", "1") == "1"  # "0" downloads the file before decoding
+_END_OF_STREAM = object()
+
+def _queue_put(q: queue.Queue, item, stop_event: threading.Event):
+    """Blocking put that gives up once the pipeline is stopped"""
+    while not stop_event.is_set():
+        try:
+            q.put(item, timeout=0.5)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+def _queue_iter(q: queue.Queue, stop_event: threading.Event):
+    while not stop_event.is_set():
+        try:
+            item = q.get(timeout=0.5)
+        except queue.Empty:
+            continue
+        if item is _END_OF_STREAM:
+            return
+        yield item
+
+def _decode_stage(source: str, audio_queue: queue.Queue, stats: dict, errors: list, stop_event: threading.Event):
+    try:
+        tick = time.perf_counter()
+        for chunk in chunk_audio(source):
+            stats["decode"]["busy"] += time.perf_counter() - tick
+            stats["decode"]["items"] += 1
+            if not _queue_put(audio_queue, chunk, stop_event):
+                return
+            tick = time.perf_counter()
+    except Exception as e:
+        errors.append(e)
+        stop_event.set()
+    finally:
+        _queue_put(audio_queue, _END_OF_STREAM, stop_event)
+
+def _transcribe_stage(audio_queue: queue.Queue, text_queue: queue.Queue, batch_size: int, 
+                      stats: dict, errors: list, stop_event: threading.Event):
+    try:
+        chunks = _queue_iter(audio_queue, stop_event)
+        finished = False
+        while not finished:
+            # Wait for one window, then batch whatever else is already decoded
+            batch = list(islice(chunks, 1))
+            if not batch:
+                break
+            while len(batch) < batch_size:
+                try:
+                    item = audio_queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is _END_OF_STREAM:
+                    finished = True
+                    break
+                batch.append(item)
+
+            tick = time.perf_counter()
+            chunk_transcripts = transcribe_audio(batch, batch_size=len(batch))
+            stats["transcribe"]["busy"] += time.perf_counter() - tick
+            stats["transcribe"]["items"] += len(batch)
+            for chunk_output in chunk_transcripts:
+                if not _queue_put(text_queue, chunk_output, stop_event):
+                    return
+    except Exception as e:
+        errors.append(e)
+        stop_event.set()
+    finally:
+        _queue_put(text_queue, _END_OF_STREAM, stop_event)
+
+def format_stage_stats(stats: dict, wall_time: float) -> str:
+    """Markdown table of per-stage busy time for the progress panel"""
+    lines = ["| Stage | Items | Busy (s) | Items/s |", "|---|---|---|---|"]
+    for stage, stage_stats in stats.items():
+        rate = stage_stats["items"] / stage_stats["busy"] if stage_stats["busy"] > 0 else 0.0
+        lines.append(f"| {stage} | {stage_stats['items']} | {stage_stats['busy']:.1f} | {rate:.2f} |")
+    lines.append(f"\n**Wall time:** {wall_time:.1f}s")
+    return "\n".join(lines)
+
+class SemanticAnswerCache:
+    """Per-video cache of answers keyed by question embedding, with LRU and TTL eviction"""
+
+    def __init__(self, similarity_threshold: float = 0.95, max_entries_per_video: int = 128, ttl_seconds: float = 24 * 3600):
+        self.similarity_threshold = similarity_threshold
+        self.max_entries_per_video = max_entries_per_video
+        self.ttl_seconds = ttl_seconds
+        self.entries = {}
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def _normalize(embedding) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32)
+        return vector / (np.linalg.norm(vector) or 1.0)
+
+    def get(self, video_title: str, question_embedding):
+        """Return the cached answer of the most similar earlier question, or None"""
+        with self.lock:
+            video_entries = self.entries.get(video_title)
+            if not video_entries:
+                return None
+
+            now = time.time()
+            for key in [key for key, entry in video_entries.items() if now - entry["created_at"] > self.ttl_seconds]:
+                del video_entries[key]
+            if not video_entries:
+                return None
+
+            keys = list(video_entries.keys())
+            similarities = np.stack([video_entries[key]["embedding"] for key in keys]) @ self._normalize(question_embedding)
+            best = int(np.argmax(similarities))
+            if similarities[best] < self.similarity_threshold:
+                return None
+
+            video_entries.move_to_end(keys[best])
+            return video_entries[keys[best]]["answer"]
+
+    def put(self, video_title: str, question: str, question_embedding, answer: str):
+        with self.lock:
+            video_entries = self.entries.setdefault(video_title, OrderedDict())
+            video_entries[question] = {
+                "embedding": self._normalize(question_embedding),
+                "answer": answer,
+                "created_at": time.time()
+            }
+            video_entries.move_to_end(question)
+            while len(video_entries) > self.max_entries_per_video:
+                video_entries.popitem(last=False)
+
+    def invalidate(self, video_title: str):
+        """Drop every cached answer of a video, called when it is re-ingested"""
+        with self.lock:
+            self.entries.pop(video_title, None)
+
+@st.cache_resource()
+def load_answer_cache():
+    return SemanticAnswerCache()
+
+answer_cache = load_answer_cache()
+video_registry = load_video_registry()
+
+def embed_query(question: str) -> list:
+    return get_embedder().encode(
         sentences=[question],
         task="retrieval.query",
     ).tolist()[0]
+
+def get_sources(question: str, video_title: str, dense_embedding: list = None):
+    if dense_embedding is None:
+        dense_embedding = embed_query(question)
     
     
     qdrant_collection_name = f"yt_transcripts"
     
-    results = qdrant_client.query_points(
-        collection_name=qdrant_collection_name,
-        query=dense_embedding,
-        with_payload=True,
-        with_vectors=False,
-        score_threshold=0.2, 
+    # Hybrid needs the BM25 sparse vector, absent from collections created before it
+    hybrid = RETRIEVAL_MODE == "hybrid" and collection_supports_hybrid(qdrant_collection_name)
+    results = search_transcripts(
+        qdrant_client,
+        qdrant_collection_name,
+        dense_embedding,
+        question,
         query_filter=models.Filter(
             must=[
                 models.FieldCondition(
@@ -162,16 +705,20 @@ def get_sources(question: str, video_title: str):
                 )
             ]
         ),
-        limit=5
+        limit=5,
+        score_threshold=0.2,
+        hybrid=hybrid
     ) 
     
     processed_results = []
-    for i, result in enumerate(results.points): 
+    for i, result in enumerate(results): 
         payload = result.payload 
         text = f"""Information {i+1}: 
                 Transcript: {payload['transcript']}
                 Video Title: {payload['video_title']}
                 """
+        if "start" in payload:
+            text += f"Timestamp: {format_timestamp(payload['start'])} - {format_timestamp(payload['end'])}\n"
         processed_results.append(text)
     
     return "\n\n".join(processed_results)
@@ -230,15 +777,28 @@ with col2:
                 st.markdown(f"{answer}")
             
         new_question = st.text_input("Ask a question:", key="question_input") 
+        if st.session_state.chat_metrics:
+            metrics = st.session_state.chat_metrics
+            if metrics.get("cached"):
+                st.caption(f"⚡ Answered from cache in {metrics['total'] * 1000:.0f} ms")
+            else:
+                st.caption(f"⏱️ Time to first token: {metrics['ttft']:.2f}s · Total: {metrics['total']:.2f}s · "
+                           f"{metrics['tokens']} tokens ({metrics['tokens_per_sec']:.1f} tok/s)")
+
         if st.button("Send Question") and new_question:
-            llm = OpenAI(
-                base_url="http://192.168.0.153:7001/v1",
-                api_key="token-abc123",
-            )
+            llm = load_llm_client()
+            video_title = st.session_state.get("video_title", "")
+            lookup_start = time.perf_counter()
+            if lazy_models["embedder"].ready:
+                question_embedding = embed_query(new_question)
+            else:
+                with st.spinner("Loading the embedding model..."):
+                    question_embedding = embed_query(new_question)
+            cached_answer = answer_cache.get(video_title, question_embedding)
+
             def response_generator():
-                video_title = st.session_state.get("video_title", "")
                 print(f"Sources Video title: {video_title}")
-                informations = get_sources(new_question, video_title) 
+                informations = get_sources(new_question, video_title, dense_embedding=question_embedding) 
                 
                 prompt = f"""You are an expert AI assistant specialized in analyzing YouTube video transcripts and providing accurate, contextual answers.
 
@@ -288,21 +848,51 @@ with col2:
                     "top_p": 0.8
                 }
                 
-                completion = llm.chat.completions.create(
-                    model="unsloth/Qwen3-8B-unsloth-bnb-4bit",
+                request_start = time.perf_counter()
+                first_token_time = None
+                num_tokens = 0
+                stream = llm.chat.completions.create(
+                    model=LLM_MODEL_NAME,
                     messages=messages,
                     **model_kwargs,
+                    stream=True,
+                    stream_options={"include_usage": True},
                     extra_body={
                         "chat_template_kwargs": {"enable_thinking": False}
                     }
                 )
-                answer = completion.choices[0].message.content
-                st.session_state.chat_history.append((new_question, answer))
-                st.rerun()
+                for chunk in stream:
+                    if chunk.usage is not None:
+                        num_tokens = chunk.usage.completion_tokens
+                    if not chunk.choices:
+                        continue
+                    content = chunk.choices[0].delta.content
+                    if content:
+                        if first_token_time is None:
+                            first_token_time = time.perf_counter() - request_start
+                        yield content
 
-            with st.chat_message("assistant"):
-                response = st.write_stream(response_generator())
-                print(f"Response: {response}")
+                total_time = time.perf_counter() - request_start
+                generation_time = total_time - (first_token_time or 0.0)
+                st.session_state.chat_metrics = {
+                    "ttft": first_token_time or total_time,
+                    "total": total_time,
+                    "tokens": num_tokens,
+                    "tokens_per_sec": num_tokens / generation_time if generation_time > 0 else 0.0
+                }
+                print(f"Time to first token: {st.session_state.chat_metrics['ttft']:.2f}s, total: {total_time:.2f}s")
+
+            if cached_answer is not None:
+                response = cached_answer
+                total_time = time.perf_counter() - lookup_start
+                st.session_state.chat_metrics = {"cached": True, "ttft": total_time, "total": total_time}
+            else:
+                with st.chat_message("assistant"):
+                    response = st.write_stream(response_generator())
+                    print(f"Response: {response}")
+                answer_cache.put(video_title, new_question, question_embedding, response)
+            st.session_state.chat_history.append((new_question, response))
+            st.rerun()
     else:
         st.info("👈 Process a YouTube video to start chatting with its transcript!")
 
@@ -317,33 +907,111 @@ def download_and_process_video(url):
     status_text.info(f"🔊 Extracting audio from: {video_title}", width=220)
     progress_bar.progress(10, width=220)
     
+    timing_text = st.empty()
+    collection_name = f"yt_transcripts"
+    create_collection(collection_name) 
+
+    video_id = video.video_id
+    ys = video.streams.get_audio_only()
+    fingerprint = audio_stream_fingerprint(ys)
+    registered = video_registry.get(video_id)
+    if registered and registered["fingerprint"] == fingerprint \
+            and count_video_points(collection_name, video_id) == registered["num_segments"]:
+        # Same audio already ingested: reuse the stored segments instead of reprocessing
+        print(f"Video {video_id} already ingested, loading transcript from {collection_name}")
+        segments = load_transcript_segments(collection_name, video_id)
+        st.session_state.progress = 100
+        st.session_state.processing_status = f"♻️ Already processed, loaded {len(segments)} stored segments"
+        st.session_state.transcript = format_transcript(segments)
+        st.session_state.video_title = video_title
+        status_text.success("✅ Video already processed, transcript loaded", width=220)
+        progress_bar.progress(100, width=220)
+        return
+
+    answer_cache.invalidate(video_title)
+    # Drop points of an earlier, different audio stream of this video
+    delete_video_points(collection_name, video_id)
+
+    # Streaming from the URL folds the download into decode, so there is no separate download stage
+    stages = ("decode", "transcribe", "embed") if STREAM_AUDIO_FROM_URL else ("download", "decode", "transcribe", "embed")
+    stats = {stage: {"items": 0, "busy": 0.0} for stage in stages}
+    pipeline_start = time.perf_counter()
+    
     with tempfile.TemporaryDirectory() as temp_dir:
-        audio_file_name = f"{re.sub(r'[ -]+', '_', video_title)}.m4a"
-        audio_file_path = os.path.join(temp_dir, audio_file_name)
-        ys = video.streams.get_audio_only()
-        ys.download(output_path=temp_dir, filename=audio_file_name)
-        print(f"Audio extracted successfully: {video_title} and saved to {audio_file_path} list of files: {os.listdir(temp_dir)}")
+        if STREAM_AUDIO_FROM_URL:
+            # ffmpeg pulls the stream progressively, so download overlaps decoding
+            audio_source = ys.url
+        else:
+            tick = time.perf_counter()
+            audio_file_name = f"{re.sub(r'[ -]+', '_', video_title)}.m4a"
+            audio_source = os.path.join(temp_dir, audio_file_name)
+            ys.download(output_path=temp_dir, filename=audio_file_name)
+            stats["download"]["busy"] += time.perf_counter() - tick
+            stats["download"]["items"] += 1
+            print(f"Audio extracted successfully: {video_title} and saved to {audio_source}")
     
         print(f"Converting audio: {video_title}")
-        status_text.info("🎧 Converting audio to chunks...", width=220)
+        status_text.info("🎧 Decoding, transcribing and indexing audio...", width=220)
         progress_bar.progress(30, width=220)
         
-        chunks_dir = chunk_audio(temp_dir, audio_file_path)
-        progress_bar.progress(50, width=220)
-        
-        status_text.info("✍️ Transcribing audio...", width=220)
-        transcripts = transcribe_audio(chunks_dir)
-        progress_bar.progress(85, width=220)        
-        
-        status_text.info("🔍 Building database...", width=220)
-        collection_name = f"yt_transcripts"
-        create_collection(collection_name) 
+        # decode -> transcribe run in threads connected by bounded queues; stitching and
+        # embedding run here so Streamlit elements are only touched from the script thread
+        audio_queue = queue.Queue(maxsize=PIPELINE_QUEUE_SIZE)
+        text_queue = queue.Queue(maxsize=PIPELINE_QUEUE_SIZE)
+        stop_event = threading.Event()
+        errors = []
+        workers = [
+            threading.Thread(target=_decode_stage, args=(audio_source, audio_queue, stats, errors, stop_event), daemon=True),
+            threading.Thread(target=_transcribe_stage, args=(audio_queue, text_queue, auto_batch_size(), stats, errors, stop_event), daemon=True),
+        ]
+        for worker in workers:
+            worker.start()
+
+        segments = []
+        pending = []
+        last_flush = time.perf_counter()
+
+        def flush_pending():
+            # One encode and one upsert for the whole batch of stitched segments
+            nonlocal last_flush
+            tick = last_flush = time.perf_counter()
+            store_transcripts(collection_name, pending, video_title, video_id, fingerprint, start_index=len(segments))
+            stats["embed"]["busy"] += time.perf_counter() - tick
+            stats["embed"]["items"] += len(pending)
+            segments.extend(pending)
+            pending.clear()
+
+        try:
+            for segment in stitch_transcript_stream(_queue_iter(text_queue, stop_event)):
+                pending.append(segment)
+                # Small batches, or a time limit, keep embedding overlapped with transcription
+                if len(pending) >= STORE_BATCH_SIZE or time.perf_counter() - last_flush >= STORE_FLUSH_SECONDS:
+                    flush_pending()
+
+                if video.length:
+                    progress_bar.progress(min(95, 30 + int(65 * segment["end"] / video.length)), width=220)
+                timing_text.markdown(format_stage_stats(stats, time.perf_counter() - pipeline_start))
+            if pending and not errors:
+                flush_pending()
+        finally:
+            stop_event.set()
+            for worker in workers:
+                worker.join()
+        if errors:
+            raise errors[0]
         
-        for i, transcript in enumerate(transcripts):
-            store_transcript(collection_name, transcript, video_title, i)
+        wall_time = time.perf_counter() - pipeline_start
+        timing_text.markdown(format_stage_stats(stats, wall_time))
+        print(f"Processed {len(segments)} segments in {wall_time:.1f}s")
         
         st.session_state.progress = 100
-        st.session_state.transcript = "\n".join(transcripts)
+        st.session_state.processing_status = format_stage_stats(stats, wall_time)
+        # Pipeline errors were raised above; an empty transcript must not mark the video as processed
+        if segments:
+            video_registry.register(video_id, fingerprint, video_title, len(segments))
+        else:
+            print(f"No transcript segments for video {video_id}, not registering it")
+        st.session_state.transcript = format_transcript(segments)
         status_text.success("✅ Processing complete!", width=220)
         progress_bar.progress(100, width=220)
         st.session_state.video_title = video_title
@@ -354,6 +1022,7 @@ if process_button and youtube_url:
     else:
         st.session_state.transcript = ""
         st.session_state.chat_history = []
+        st.session_state.chat_metrics = None
         
         st.session_state.processing_status = ""
         st.session_state.progress = 0
@@ -367,6 +1036,13 @@ if process_button and youtube_url:
         st.rerun()
 
     
+st.sidebar.title("🧠 Models")
+for lazy_model in lazy_models.values():
+    icon = {"ready": "🟢", "loading": "🟡", "failed": "🔴"}.get(lazy_model.status, "⚪")
+    st.sidebar.caption(f"{icon} {lazy_model.name}: {lazy_model.status}")
+    if lazy_model.error:
+        st.sidebar.caption(lazy_model.error)
+
 st.sidebar.title("ℹ️ How to Use")
 st.sidebar.markdown("""
 1. **Enter YouTube URL** in the left panel